@@ -0,0 +1,39 @@
+"""add access tracking and tier to files
+
+Revision ID: 7b3e91d4c2a8
+Revises: 2cfdac5fc0c1
+Create Date: 2026-10-19 10:12:31.418207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "7b3e91d4c2a8"
+down_revision: Union[str, None] = "2cfdac5fc0c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("files", sa.Column("last_accessed_at", sa.DateTime(), nullable=True))
+    op.add_column(
+        "files",
+        sa.Column("read_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "files",
+        sa.Column("tier", sa.String(length=16), nullable=False, server_default="hot"),
+    )
+
+    op.create_index("idx_files_tier_last_accessed", "files", ["tier", "last_accessed_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_files_tier_last_accessed", table_name="files")
+    op.drop_column("files", "tier")
+    op.drop_column("files", "read_count")
+    op.drop_column("files", "last_accessed_at")
@@ -0,0 +1,78 @@
+"""Worker CPU time per GB served for each download mode.
+
+Usage:
+    python -m benchmarks.bench_download --size-mb 256 --rounds 4
+
+`direct (wsgi iteration)` is what a WSGI server without `wsgi.file_wrapper`
+does: every chunk is read into Python and written out again. `direct
+(sendfile)` is what gunicorn does with the same response through
+`wsgi.file_wrapper`. `offload` is the worker's share of an
+X-Accel-Redirect/X-Sendfile download, the proxy does the rest.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+from flask import Flask
+
+from src.app.download_offload import DownloadMode, direct_response, offload_response
+
+GB = 1024**3
+
+
+def cpu_per_gb(serve, size: int, rounds: int) -> float:
+    start = time.process_time()
+    for _ in range(rounds):
+        serve()
+    return (time.process_time() - start) / (size * rounds / GB)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=4)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    app = Flask(__name__)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = os.path.join(tmp, "blob")
+        with open(file_path, "wb") as f:
+            f.write(os.urandom(size))
+
+        def serve_wsgi_iteration():
+            with app.test_request_context():
+                response = direct_response(file_path, "blob")
+                response.direct_passthrough = False
+                for _ in response.response:
+                    pass
+                response.close()
+
+        def serve_sendfile():
+            with open(file_path, "rb") as src, open(os.devnull, "wb") as dst:
+                offset = 0
+                while offset < size:
+                    offset += os.sendfile(dst.fileno(), src.fileno(), offset, size)
+
+        def serve_offload():
+            with app.test_request_context():
+                offload_response(file_path, "blob", DownloadMode.X_ACCEL_REDIRECT)
+
+        results = {
+            "direct (wsgi iteration)": cpu_per_gb(
+                serve_wsgi_iteration, size, args.rounds
+            ),
+            "direct (sendfile)": cpu_per_gb(serve_sendfile, size, args.rounds),
+            "offload": cpu_per_gb(serve_offload, size, args.rounds),
+        }
+
+    print(f"file size: {args.size_mb} MiB, rounds: {args.rounds}")
+    for mode, seconds in results.items():
+        print(f"{mode:<26} {seconds * 1000:10.2f} ms CPU per GB")
+
+
+if __name__ == "__main__":
+    main()
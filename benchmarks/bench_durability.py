@@ -0,0 +1,104 @@
+"""Upload latency and throughput for each write-durability mode.
+
+Usage:
+    python -m benchmarks.bench_durability --writers 16 --files 200 --size-kb 4
+    python -m benchmarks.bench_durability --processes 4 --writers 1
+
+Every writer thread stores `--files` blobs the way `save_blob` does: write
+the file into a `<xx>/` subdirectory, then flush it and its directory
+according to the mode before the (simulated) database commit. With
+`--processes` the writers are spread over forked processes, each with its
+own group committer, like gunicorn worker processes.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from statistics import quantiles
+
+from src.app.durability import DurabilityMode, make_durable
+
+
+def run_writers(
+    mode: DurabilityMode, root: str, prefix: int, writers: int, files: int, size: int
+) -> list[float]:
+    latencies: list[float] = []
+    lock = threading.Lock()
+    payload = os.urandom(size)
+
+    def writer(index: int):
+        local = []
+        for n in range(files):
+            blob_dir = os.path.join(root, f"{(index * files + n) % 256:02x}")
+            os.makedirs(blob_dir, exist_ok=True)
+            file_path = os.path.join(blob_dir, f"{prefix}-{index}-{n}")
+            started_at = time.perf_counter()
+            with open(file_path, "wb") as f:
+                f.write(payload)
+            make_durable([file_path], [blob_dir], mode)
+            local.append(time.perf_counter() - started_at)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def run_mode(
+    mode: DurabilityMode, root: str, processes: int, writers: int, files: int, size: int
+):
+    started_at = time.perf_counter()
+    if processes == 1:
+        latencies = run_writers(mode, root, 0, writers, files, size)
+    else:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes) as pool:
+            results = pool.starmap(
+                run_writers,
+                [(mode, root, p, writers, files, size) for p in range(processes)],
+            )
+        latencies = [latency for result in results for latency in result]
+    elapsed = time.perf_counter() - started_at
+
+    percentiles = quantiles(latencies, n=100)
+    return len(latencies) / elapsed, percentiles[49], percentiles[98]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--writers", type=int, default=16, help="threads per process")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--size-kb", type=int, default=4)
+    parser.add_argument("--dir", default=None, help="directory on the disk to test")
+    args = parser.parse_args()
+
+    print(
+        f"processes: {args.processes}, writers: {args.writers}, "
+        f"files per writer: {args.files}, size: {args.size_kb} KiB"
+    )
+    print(f"{'mode':<8} {'files/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for mode in DurabilityMode:
+        with tempfile.TemporaryDirectory(dir=args.dir) as root:
+            throughput, p50, p99 = run_mode(
+                mode,
+                root,
+                args.processes,
+                args.writers,
+                args.files,
+                args.size_kb * 1024,
+            )
+        print(
+            f"{mode.value:<8} {throughput:10.0f} {p50 * 1000:10.2f} {p99 * 1000:10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,9 @@ from dotenv import load_dotenv
 
 from src.app.docs_api import app, api
 from src.app.routers import auth_bp, file_bp, auth_ns, file_ns
+from src.app.pack_store import pack_store
+from src.app.tiering import access_tracker, tiering_engine
+from src.config.settings import settings
 
 dotenv_path = join(dirname(__file__), ".env")
 load_dotenv(dotenv_path)
@@ -14,6 +17,13 @@ api.add_namespace(file_ns, path="/file")
 app.register_blueprint(auth_bp, url_prefix="/auth")
 app.register_blueprint(file_bp, url_prefix="/file")
 
+if pack_store is not None:
+    pack_store.start_compaction(settings.PACK_COMPACTION_INTERVAL)
+
+access_tracker.start()
+if settings.TIERING_ENABLED:
+    tiering_engine.start(settings.TIERING_INTERVAL)
+
 if __name__ == "__main__":
     app.run(
         host=str(os.getenv("APP_HOST")),
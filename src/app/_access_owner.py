@@ -5,7 +5,8 @@ from functools import wraps
 from flask_jwt_extended import get_jwt_identity
 
 from src.db.models import File, User
-from src.app.file_dir import get_file_path
+from src.app.file_dir import Tier, resolve_file_path
+from src.app.pack_store import is_packed
 from src.db.data_base import SessionLocal
 from src.utils.custom_logger import get_logger
 
@@ -21,7 +22,7 @@ def file_owner_required(f):
     1. If the file hash is provided
     2. If the current user exists
     3. If the file exists and belongs to the current user
-    4. If the file exists on disk
+    4. If the file exists in the storage tier recorded on its row
 
     Args:
         f (function): The route function to be decorated
@@ -60,8 +61,14 @@ def file_owner_required(f):
                 )
                 return jsonify({"error": "File not found or access denied"}), 403
 
-            file_path = get_file_path(file_hash)
-            if not file_path or not os.path.exists(file_path):
+            file_path = resolve_file_path(file_hash, file_record.tier)
+
+            if file_record.tier == Tier.PACKED.value:
+                stored = is_packed(file_hash)
+            else:
+                stored = bool(file_path) and os.path.exists(file_path)
+
+            if not stored:
                 logger.error(
                     f"File not found on disk. "
                     f"File hash: {file_hash}, Expected path: {file_path}"
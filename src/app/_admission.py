@@ -0,0 +1,319 @@
+import os
+import json
+import math
+import time
+import fcntl
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+from flask import jsonify, request
+from flask_jwt_extended import get_jwt_identity
+
+from src.config.settings import settings
+from src.app.file_dir import allowed_file
+from src.utils.custom_logger import get_logger
+
+logger = get_logger(__name__)
+logger.propagate = False
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at a constant rate up to a fixed capacity.
+
+    Wall-clock time is used so that a bucket persisted by one process can be
+    refilled correctly by another.
+
+    Args:
+        rate (float): Tokens added per second
+        capacity (float): Maximum number of tokens the bucket can hold
+        tokens (float): Tokens currently held, defaults to a full bucket
+        updated_at (float): Timestamp of the last refill
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        tokens: float | None = None,
+        updated_at: float | None = None,
+    ):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity if tokens is None else tokens)
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    def _refill(self) -> None:
+        now = time.time()
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available, 0 if they already are."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    @property
+    def full(self) -> bool:
+        return self.wait_time(self.capacity) == 0
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class ConcurrencyLimiter:
+    """
+    Non-blocking counter of in-flight operations per key.
+
+    Every slot records the pid of the process holding it, so slots left
+    behind by a killed worker can be reclaimed.
+
+    Args:
+        limit (int): Maximum number of concurrent operations per key
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active: dict[str, list[int]] = {}
+
+    def try_acquire(self, key: str, owner: int) -> bool:
+        owners = self.active.setdefault(key, [])
+        if len(owners) >= self.limit:
+            return False
+        owners.append(owner)
+        return True
+
+    def release(self, key: str, owner: int) -> None:
+        owners = self.active.get(key, [])
+        if owner in owners:
+            owners.remove(owner)
+        if not owners:
+            self.active.pop(key, None)
+
+    def prune(self) -> None:
+        """Drop slots held by processes that no longer exist."""
+        for key, owners in list(self.active.items()):
+            owners[:] = [owner for owner in owners if _pid_alive(owner)]
+            if not owners:
+                del self.active[key]
+
+
+class UploadAdmission:
+    """
+    Per-user and global concurrency and bandwidth limits for uploads.
+
+    gunicorn runs several worker processes, so the slots and buckets are kept
+    in a JSON file shared by all of them. Every decision takes an flock on
+    the file, loads the state, updates it and writes it back, which makes the
+    limits apply to the whole server rather than to each worker.
+
+    Bandwidth buckets are charged with the declared `Content-Length` up
+    front. Uploads are therefore limited by the size they announce, not by
+    the bytes actually received, and a burst of large uploads is refused
+    before any body is read.
+
+    Args:
+        state_path (str): File holding the shared limiter state
+        max_concurrent_per_user (int): Upload slots per user
+        max_concurrent_total (int): Upload slots for the whole server
+        user_bandwidth (int): Bytes per second granted to each user
+        total_bandwidth (int): Bytes per second granted to the whole server
+        max_upload_size (int): Largest accepted upload
+    """
+
+    GLOBAL_KEY = "*"
+
+    def __init__(
+        self,
+        state_path: str,
+        max_concurrent_per_user: int,
+        max_concurrent_total: int,
+        user_bandwidth: int,
+        total_bandwidth: int,
+        max_upload_size: int,
+    ):
+        self.state_path = state_path
+        self._lock = threading.Lock()
+        self.user_bandwidth = user_bandwidth
+        self.total_bandwidth = total_bandwidth
+        self.max_upload_size = max_upload_size
+        self.user_slots = ConcurrencyLimiter(max_concurrent_per_user)
+        self.total_slots = ConcurrencyLimiter(max_concurrent_total)
+        self.user_buckets: dict[str, TokenBucket] = {}
+        self.total_bucket = self._new_bucket(total_bandwidth)
+
+    def _new_bucket(self, rate: int, *state: float) -> TokenBucket:
+        return TokenBucket(rate, max(rate, self.max_upload_size), *state)
+
+    def _load(self, state: dict) -> None:
+        self.user_slots.active = state.get("user_slots", {})
+        self.total_slots.active = state.get("total_slots", {})
+        self.user_slots.prune()
+        self.total_slots.prune()
+        self.user_buckets = {
+            username: self._new_bucket(self.user_bandwidth, *bucket)
+            for username, bucket in state.get("user_buckets", {}).items()
+        }
+        self.total_bucket = self._new_bucket(
+            self.total_bandwidth, *state.get("total_bucket", ())
+        )
+
+    def _dump(self) -> dict:
+        # Full buckets carry no information, dropping them bounds the file
+        return {
+            "user_slots": self.user_slots.active,
+            "total_slots": self.total_slots.active,
+            "user_buckets": {
+                username: [bucket.tokens, bucket.updated_at]
+                for username, bucket in self.user_buckets.items()
+                if not bucket.full
+            },
+            "total_bucket": [self.total_bucket.tokens, self.total_bucket.updated_at],
+        }
+
+    @contextmanager
+    def _shared_state(self):
+        with self._lock:
+            fd = os.open(self.state_path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, "r+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    raw = f.read()
+                    try:
+                        state = json.loads(raw) if raw else {}
+                    except ValueError:
+                        logger.warning("Upload admission state is corrupt, resetting")
+                        state = {}
+                    self._load(state)
+                    yield
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(self._dump()))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _user_bucket(self, username: str) -> TokenBucket:
+        bucket = self.user_buckets.get(username)
+        if bucket is None:
+            bucket = self._new_bucket(self.user_bandwidth)
+            self.user_buckets[username] = bucket
+        return bucket
+
+    def acquire(self, username: str, size: int) -> tuple[int, float] | None:
+        """
+        Try to admit an upload of `size` bytes for `username`.
+
+        Returns:
+            None if admitted, otherwise (status_code, retry_after_seconds)
+        """
+        pid = os.getpid()
+        with self._shared_state():
+            if not self.total_slots.try_acquire(self.GLOBAL_KEY, pid):
+                return 503, 1.0
+            if not self.user_slots.try_acquire(username, pid):
+                self.total_slots.release(self.GLOBAL_KEY, pid)
+                return 429, 1.0
+
+            user_bucket = self._user_bucket(username)
+            user_wait = user_bucket.wait_time(size)
+            total_wait = self.total_bucket.wait_time(size)
+            if user_wait or total_wait:
+                self.user_slots.release(username, pid)
+                self.total_slots.release(self.GLOBAL_KEY, pid)
+                if total_wait >= user_wait:
+                    return 503, total_wait
+                return 429, user_wait
+
+            user_bucket.consume(size)
+            self.total_bucket.consume(size)
+            return None
+
+    def release(self, username: str) -> None:
+        pid = os.getpid()
+        with self._shared_state():
+            self.user_slots.release(username, pid)
+            self.total_slots.release(self.GLOBAL_KEY, pid)
+
+
+upload_admission = UploadAdmission(
+    state_path=settings.UPLOAD_ADMISSION_STATE_FILE,
+    max_concurrent_per_user=settings.UPLOAD_MAX_CONCURRENT_PER_USER,
+    max_concurrent_total=settings.UPLOAD_MAX_CONCURRENT_TOTAL,
+    user_bandwidth=settings.UPLOAD_USER_BANDWIDTH,
+    total_bandwidth=settings.UPLOAD_TOTAL_BANDWIDTH,
+    max_upload_size=settings.MAX_UPLOAD_SIZE,
+)
+
+
+def upload_admission_required(f):
+    """
+    Decorator to admit or reject an upload before its body is read.
+
+    This decorator checks:
+    1. If the request declares a `Content-Length` within `MAX_UPLOAD_SIZE`
+    2. If the optional `X-File-Name` header has an allowed extension
+    3. If the user and the server have free upload slots and bandwidth
+
+    Overloaded requests are answered with 429 (per-user limit) or 503
+    (global limit) and a `Retry-After` header.
+
+    Args:
+        f (function): The route function to be decorated
+
+    Returns:
+        function: The decorated function with admission control
+    """
+
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        content_length = request.content_length
+        if content_length is None:
+            logger.warning("Upload rejected: missing Content-Length")
+            return jsonify({"error": "Content-Length required"}), 411
+
+        if content_length > upload_admission.max_upload_size:
+            logger.warning(f"Upload rejected: {content_length} bytes is too large")
+            return jsonify({"error": "File too large"}), 413
+
+        filename = request.headers.get("X-File-Name")
+        if filename is not None and not allowed_file(filename):
+            logger.warning(f"Upload rejected: disallowed file type {filename}")
+            return jsonify({"error": "File type not allowed"}), 400
+
+        current_user = get_jwt_identity()
+        rejection = upload_admission.acquire(current_user, content_length)
+        if rejection is not None:
+            status, retry_after = rejection
+            logger.warning(
+                f"Upload rejected with {status} for user {current_user}, "
+                f"retry after {retry_after:.2f}s"
+            )
+            return (
+                jsonify({"error": "Too many uploads, retry later"}),
+                status,
+                {"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+        try:
+            return f(*args, **kwargs)
+        finally:
+            upload_admission.release(current_user)
+
+    return decorated
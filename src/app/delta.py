@@ -0,0 +1,171 @@
+import os
+import zlib
+import base64
+import hashlib
+from typing import BinaryIO, Iterable
+
+ADLER_MOD = 65521
+STRONG_DIGEST_LENGTH = 32
+COPY_CHUNK_BLOCKS = 16
+
+
+class DeltaError(ValueError):
+    """Raised when delta instructions cannot be applied to the base file"""
+
+
+def strong_checksum(block: bytes) -> str:
+    return hashlib.sha256(block).hexdigest()[:STRONG_DIGEST_LENGTH]
+
+
+def compute_signature(base: BinaryIO, block_size: int) -> list[dict[str, int | str]]:
+    """
+    Split the base file into fixed-size blocks and checksum each one.
+
+    The weak checksum is adler32, which the client can roll over its new
+    content one byte at a time; the strong checksum confirms weak matches.
+
+    Returns:
+        list: `{"weak": int, "strong": str}` per block, in file order
+    """
+    blocks = []
+    while block := base.read(block_size):
+        blocks.append({"weak": zlib.adler32(block), "strong": strong_checksum(block)})
+    return blocks
+
+
+def compute_delta(
+    signature: list[dict[str, int | str]], data: bytes, block_size: int
+) -> list[dict[str, int | str]]:
+    """
+    Reference client: express `data` as copies of base blocks and literals.
+
+    Returns:
+        list: Instructions accepted by `apply_delta`
+    """
+    weak_index: dict[int, list[int]] = {}
+    for index, block in enumerate(signature):
+        weak_index.setdefault(block["weak"], []).append(index)
+
+    instructions: list[dict[str, int | str]] = []
+    literal = bytearray()
+
+    def emit_literal():
+        if literal:
+            instructions.append({"literal": base64.b64encode(literal).decode()})
+            literal.clear()
+
+    def emit_copy(index: int):
+        last = instructions[-1] if instructions else None
+        if last and "copy" in last and last["copy"] + last["count"] == index:
+            last["count"] += 1
+        else:
+            instructions.append({"copy": index, "count": 1})
+
+    pos = 0
+    weak = None
+    while pos < len(data):
+        window = data[pos : pos + block_size]
+        if weak is None:
+            weak = zlib.adler32(window)
+
+        match = None
+        for index in weak_index.get(weak, ()):
+            if signature[index]["strong"] == strong_checksum(window):
+                match = index
+                break
+
+        if match is not None:
+            emit_literal()
+            emit_copy(match)
+            pos += len(window)
+            weak = None
+            continue
+
+        literal.append(data[pos])
+        if pos + block_size < len(data):
+            # Roll the adler32 window forward by one byte
+            out_byte, in_byte = data[pos], data[pos + block_size]
+            a, b = weak & 0xFFFF, weak >> 16
+            a = (a - out_byte + in_byte) % ADLER_MOD
+            b = (b - block_size * out_byte + a - 1) % ADLER_MOD
+            weak = (b << 16) | a
+        else:
+            weak = None
+        pos += 1
+
+    emit_literal()
+    return instructions
+
+
+def apply_delta(
+    base: BinaryIO,
+    block_size: int,
+    instructions: Iterable[dict],
+    out: BinaryIO,
+    max_size: int | None = None,
+) -> tuple[str, int]:
+    """
+    Rebuild a file from a base file and delta instructions, streaming to `out`.
+
+    Args:
+        base: Seekable base file the signature was computed from; copies seek
+            back and forth, so it should not be a compressed stream
+        block_size: Block size the signature was computed with
+        instructions: `{"copy": first_block, "count": n}` or `{"literal": base64}`
+        out: Binary file the new content is written to
+        max_size: Largest rebuilt size accepted; a short delta can repeat
+            copies of the whole base file, so the output is checked as it grows
+
+    Returns:
+        tuple: SHA-256 hex digest and size of the rebuilt content
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    base_size = base.seek(0, os.SEEK_END)
+
+    def write(chunk: bytes):
+        nonlocal size
+        if max_size is not None and size + len(chunk) > max_size:
+            raise DeltaError(f"Rebuilt file exceeds {max_size} bytes")
+        out.write(chunk)
+        hasher.update(chunk)
+        size += len(chunk)
+
+    for instruction in instructions:
+        if not isinstance(instruction, dict):
+            raise DeltaError(f"Invalid instruction: {instruction}")
+        if "literal" in instruction:
+            try:
+                literal = base64.b64decode(instruction["literal"], validate=True)
+            except (TypeError, ValueError) as e:
+                raise DeltaError(f"Invalid literal: {str(e)}")
+            write(literal)
+        elif "copy" in instruction:
+            first = instruction["copy"]
+            count = instruction.get("count", 1)
+            if (
+                not isinstance(first, int)
+                or not isinstance(count, int)
+                or first < 0
+                or count < 1
+            ):
+                raise DeltaError(f"Invalid copy instruction: {instruction}")
+            if first * block_size >= base_size:
+                raise DeltaError(f"Copy past the end of the base file: {instruction}")
+
+            base.seek(first * block_size)
+            remaining = count * block_size
+            while remaining > 0:
+                chunk = base.read(min(remaining, COPY_CHUNK_BLOCKS * block_size))
+                if not chunk:
+                    break
+                write(chunk)
+                remaining -= len(chunk)
+
+            # Only the last block of the base file may be short
+            if remaining >= block_size:
+                raise DeltaError(f"Copy past the end of the base file: {instruction}")
+        else:
+            raise DeltaError(f"Unknown instruction: {instruction}")
+
+    return hasher.hexdigest(), size
@@ -5,12 +5,15 @@ from flask_restx import Api
 from flask_restx import fields, Namespace
 from flask_jwt_extended import JWTManager
 
+from src.config.settings import settings
+
 app = Flask(__name__)
 key = secrets.token_urlsafe(32)
 app.config["JWT_SECRET_KEY"] = key
 app.config["JWT_TOKEN_LOCATION"] = ["headers"]
 app.config["JWT_HEADER_NAME"] = "Authorization"
 app.config["JWT_HEADER_TYPE"] = "Bearer"
+app.config["MAX_CONTENT_LENGTH"] = settings.MAX_UPLOAD_SIZE
 jwt = JWTManager(app)
 
 authorizations = {
@@ -52,4 +55,28 @@ file_response_model = api.model(
     "FileResponse", {"hash": fields.String(description="File hash")}
 )
 
+delta_upload_model = api.model(
+    "DeltaUpload",
+    {
+        "hash": fields.String(required=True, description="SHA256 of the new file"),
+        "filename": fields.String(required=True, description="Name of the new file"),
+        "block_size": fields.Integer(
+            required=True, description="Block size of the signature used"
+        ),
+        "instructions": fields.List(
+            fields.Raw,
+            required=True,
+            description='{"copy": first_block, "count": n} or {"literal": base64}',
+        ),
+    },
+)
+
+share_link_model = api.model(
+    "ShareLink",
+    {
+        "expires_in": fields.Integer(description="Link lifetime in seconds"),
+        "range": fields.String(description="Inclusive byte range, e.g. 0-1023"),
+    },
+)
+
 error_model = api.model("Error", {"error": fields.String(description="Error message")})
@@ -0,0 +1,65 @@
+import os
+from enum import Enum
+
+from flask import Response, send_from_directory
+
+from src.config.settings import settings
+from src.app.file_dir import StorageDir
+
+
+class DownloadMode(Enum):
+    """How file bytes reach the client once ownership is verified"""
+
+    DIRECT = "direct"
+    X_ACCEL_REDIRECT = "x-accel-redirect"
+    X_SENDFILE = "x-sendfile"
+
+    @property
+    def offloaded(self) -> bool:
+        return self is not DownloadMode.DIRECT
+
+
+def get_download_mode() -> DownloadMode:
+    return DownloadMode(settings.DOWNLOAD_MODE)
+
+
+def offload_response(file_path: str, download_name: str, mode: DownloadMode) -> Response:
+    """
+    Build an empty response telling the fronting proxy which file to serve.
+
+    Args:
+        file_path: Path to the file under the storage directory
+        download_name: File name offered to the client
+        mode: Either X_ACCEL_REDIRECT (nginx) or X_SENDFILE (Apache, lighttpd)
+
+    Returns:
+        Response: Headers-only response, the proxy streams the body
+    """
+    response = Response(status=200, mimetype="application/octet-stream")
+    response.headers["Content-Disposition"] = f"attachment; filename={download_name}"
+
+    if mode is DownloadMode.X_ACCEL_REDIRECT:
+        relative_path = os.path.relpath(file_path, StorageDir.STORE.path)
+        internal_path = settings.DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/"
+        response.headers["X-Accel-Redirect"] = internal_path + relative_path.replace(
+            os.sep, "/"
+        )
+    else:
+        response.headers["X-Sendfile"] = os.path.abspath(file_path)
+    return response
+
+
+def direct_response(file_path: str, download_name: str) -> Response:
+    """
+    Serve the file from the worker.
+
+    The open file is handed to the WSGI server through `wsgi.file_wrapper`,
+    which servers such as gunicorn turn into an `os.sendfile` zero-copy
+    transfer from the page cache to the socket.
+    """
+    return send_from_directory(
+        directory=os.path.dirname(file_path),
+        path=os.path.basename(file_path),
+        as_attachment=True,
+        download_name=download_name,
+    )
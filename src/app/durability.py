@@ -0,0 +1,185 @@
+import os
+import time
+import threading
+from enum import Enum
+from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config.settings import settings
+from src.utils.custom_logger import get_logger
+
+logger = get_logger(__name__)
+logger.propagate = False
+
+
+class DurabilityMode(Enum):
+    """When written blobs are flushed to stable storage"""
+
+    NONE = "none"
+    FSYNC = "fsync"
+    GROUP = "group"
+
+
+def fsync_path(path: str, data_only: bool = False) -> None:
+    """
+    fsync a file or directory by path.
+
+    `data_only` uses fdatasync, which still persists the file size but skips
+    timestamps; enough for blob contents, not for directory entries.
+    """
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        (os.fdatasync if data_only else os.fsync)(fd)
+    finally:
+        os.close(fd)
+
+
+class _SyncRequest:
+    def __init__(self, files: list[str], dirs: list[str]):
+        self.paths = files + dirs
+        self.files = files
+        self.dirs = dirs
+        self.done = threading.Event()
+        self.error: Exception | None = None
+
+
+class GroupCommitter:
+    """
+    Batches fsync requests from concurrent writers.
+
+    A flusher thread takes every request queued so far and fsyncs the union
+    of their paths: the files in parallel on `flush_threads` threads, then
+    the directories. A batch of many uploads therefore costs about one fsync
+    round trip instead of one per file, and shared directories are flushed
+    once. Requests arriving during a flush form the next batch.
+
+    Batching only happens between threads of one process. Under sync worker
+    processes each committer sees one request at a time, which is why
+    `fsync` is the default mode and `group` is meant for threaded workers.
+
+    Args:
+        max_delay (float): Extra seconds to wait for more requests before
+            flushing a batch, 0 to flush as soon as one is queued
+        max_batch (int): Number of queued requests that flushes immediately
+        flush_threads (int): Number of files fsynced concurrently in a batch
+    """
+
+    def __init__(
+        self, max_delay: float = 0.0, max_batch: int = 256, flush_threads: int = 8
+    ):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.flush_threads = flush_threads
+        self._pending: list[_SyncRequest] = []
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self.batches = 0
+        self.synced_paths = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.flush_threads, thread_name_prefix="group-fsync"
+            )
+            self._thread = threading.Thread(
+                target=self._run, name="group-commit", daemon=True
+            )
+            self._thread.start()
+
+    def sync(self, files: Iterable[str], dirs: Iterable[str] = ()) -> None:
+        """Block until `files` and `dirs` are durable, re-raising any fsync error."""
+        request = _SyncRequest(list(files), list(dirs))
+        with self._cond:
+            self._ensure_started()
+            self._pending.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            if self.max_delay:
+                deadline = time.monotonic() + self.max_delay
+                with self._cond:
+                    while len(self._pending) < self.max_batch:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+            with self._cond:
+                batch, self._pending = self._pending, []
+            self._flush(batch)
+
+    def _fsync_all(self, paths: list[str], data_only: bool) -> dict[str, Exception]:
+        def attempt(path: str) -> OSError | None:
+            try:
+                fsync_path(path, data_only)
+            except OSError as e:
+                logger.error(f"fsync failed for {path}: {str(e)}")
+                return e
+            return None
+
+        results = (
+            self._executor.map(attempt, paths)
+            if self._executor is not None and len(paths) > 1
+            else map(attempt, paths)
+        )
+        return {
+            path: error for path, error in zip(paths, results) if error is not None
+        }
+
+    def _flush(self, batch: list[_SyncRequest]) -> None:
+        # Files first, then directories, so new entries point at durable data
+        files = list(dict.fromkeys(path for r in batch for path in r.files))
+        dirs = list(dict.fromkeys(path for r in batch for path in r.dirs))
+        errors = self._fsync_all(files, data_only=True)
+        errors.update(self._fsync_all(dirs, data_only=False))
+
+        self.batches += 1
+        self.synced_paths += len(files) + len(dirs)
+        for request in batch:
+            request.error = next(
+                (errors[path] for path in request.paths if path in errors), None
+            )
+            request.done.set()
+
+
+group_committer = GroupCommitter(
+    max_delay=settings.DURABILITY_GROUP_DELAY_MS / 1000,
+    max_batch=settings.DURABILITY_GROUP_MAX_BATCH,
+    flush_threads=settings.DURABILITY_GROUP_FLUSH_THREADS,
+)
+
+
+def get_durability_mode() -> DurabilityMode:
+    return DurabilityMode(settings.DURABILITY_MODE)
+
+
+def make_durable(
+    files: Iterable[str],
+    dirs: Iterable[str] = (),
+    mode: DurabilityMode | None = None,
+) -> None:
+    """
+    Flush written files and the directories holding their entries.
+
+    Args:
+        files: Files whose contents were written
+        dirs: Directories in which entries were created or renamed
+        mode: Durability mode, defaults to the configured `DURABILITY_MODE`
+    """
+    mode = mode or get_durability_mode()
+    if mode is DurabilityMode.NONE:
+        return
+    if mode is DurabilityMode.FSYNC:
+        for path in dict.fromkeys(files):
+            fsync_path(path, data_only=True)
+        for path in dict.fromkeys(dirs):
+            fsync_path(path)
+        return
+    group_committer.sync(files, dirs)
@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+
+from src.config.settings import settings
+
+
+class FileCache:
+    """
+    Bounded LRU cache of small file contents keyed by content hash.
+
+    Stored files are immutable, so entries never need invalidation and are
+    only dropped to stay within the memory budget.
+
+    Args:
+        max_bytes (int): Total memory budget for cached contents
+        max_file_size (int): Largest file that is admitted into the cache
+    """
+
+    def __init__(self, max_bytes: int, max_file_size: int):
+        self.max_bytes = max_bytes
+        self.max_file_size = min(max_file_size, max_bytes)
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def accepts(self, size: int) -> bool:
+        return size <= self.max_file_size
+
+    def get(self, file_hash: str) -> bytes | None:
+        with self._lock:
+            data = self._entries.get(file_hash)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(file_hash)
+            self.hits += 1
+            return data
+
+    def put(self, file_hash: str, data: bytes) -> None:
+        if not self.accepts(len(data)):
+            return
+        with self._lock:
+            if file_hash in self._entries:
+                self._entries.move_to_end(file_hash)
+                return
+            while self._entries and self.size + len(data) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+            self._entries[file_hash] = data
+            self.size += len(data)
+
+    def discard(self, file_hash: str) -> None:
+        with self._lock:
+            data = self._entries.pop(file_hash, None)
+            if data is not None:
+                self.size -= len(data)
+
+    def stats(self) -> dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Every gunicorn worker holds its own cache, so the budget is split between them
+file_cache = FileCache(
+    max_bytes=settings.DOWNLOAD_CACHE_MAX_BYTES // settings.WEB_CONCURRENCY,
+    max_file_size=settings.DOWNLOAD_CACHE_MAX_FILE_SIZE,
+)
@@ -1,15 +1,35 @@
 import os
 from enum import Enum, auto
 
+from src.config.settings import settings
+
 
 class StorageDir(Enum):
     STORE = auto()
+    PACK = auto()
+    COLD = auto()
 
     @property
     def path(self) -> str:
+        if self is StorageDir.COLD:
+            return settings.TIERING_COLD_ROOT
         return self.name.lower()
 
 
+class Tier(Enum):
+    HOT = "hot"
+    PACKED = "packed"
+    COLD = "cold"
+    COLD_GZIP = "cold-gzip"
+
+    @property
+    def is_cold(self) -> bool:
+        return self in (Tier.COLD, Tier.COLD_GZIP)
+
+
+COLD_TIERS = {t.value for t in Tier if t.is_cold}
+
+
 class Extensions(Enum):
     TXT = auto()
     PDF = auto()
@@ -30,6 +50,20 @@ def get_file_path(file_hash) -> str | None:
     return os.path.join(StorageDir.STORE.path, subdir, file_hash)
 
 
+def get_cold_file_path(file_hash, tier) -> str | None:
+    if len(file_hash) < 2:
+        return None
+    subdir = file_hash[:2]
+    suffix = ".gz" if tier == Tier.COLD_GZIP.value else ""
+    return os.path.join(StorageDir.COLD.path, subdir, file_hash + suffix)
+
+
+def resolve_file_path(file_hash, tier) -> str | None:
+    if tier in COLD_TIERS:
+        return get_cold_file_path(file_hash, tier)
+    return get_file_path(file_hash)
+
+
 def allowed_file(filename) -> bool:
     if "." not in filename:
         return False
@@ -0,0 +1,289 @@
+import os
+import fcntl
+import threading
+from contextlib import contextmanager
+
+from src.config.settings import settings
+from src.app.file_dir import StorageDir
+from src.app.durability import DurabilityMode, make_durable
+from src.utils.custom_logger import get_logger
+
+logger = get_logger(__name__)
+logger.propagate = False
+
+SEGMENT_SUFFIX = ".pack"
+
+
+class PackStore:
+    """
+    Append-only storage of small blobs inside large segment files.
+
+    Layout under `root`:
+        <nnnnnn>.pack   segment files, blobs are appended back to back
+        index.log       one line per change: `P <hash> <segment> <offset> <length>`
+                        for a stored blob, `D <hash>` for a deleted one
+        lock            flock target serializing writers across processes
+
+    Blob data is always written before its index line, so a crash can only
+    leave unreferenced bytes or a torn last index line behind. Compaction
+    reclaims the bytes and the next writer cuts the torn line off before
+    appending. Readers in other processes pick up new index lines lazily on
+    a lookup miss.
+
+    Args:
+        root (str): Directory holding segments and the index
+        segment_size (int): Size after which a new segment is started
+        max_file_size (int): Largest blob accepted into the pack store
+        compaction_threshold (float): Dead-byte ratio that makes a sealed
+            segment eligible for compaction
+    """
+
+    def __init__(
+        self,
+        root: str,
+        segment_size: int,
+        max_file_size: int,
+        compaction_threshold: float = 0.5,
+    ):
+        self.root = root
+        self.segment_size = segment_size
+        self.max_file_size = max_file_size
+        self.compaction_threshold = compaction_threshold
+        self.index_path = os.path.join(root, "index.log")
+        self._lock_path = os.path.join(root, "lock")
+        self._thread_lock = threading.RLock()
+        self._index: dict[str, tuple[int, int, int]] = {}
+        self._index_inode: int | None = None
+        self._index_pos = 0
+
+        os.makedirs(root, exist_ok=True)
+        open(self.index_path, "ab").close()
+        self._refresh()
+
+    def accepts(self, size: int) -> bool:
+        return size <= self.max_file_size
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.root, f"{segment:06d}{SEGMENT_SUFFIX}")
+
+    def _segments(self) -> list[int]:
+        return sorted(
+            int(name[: -len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.root)
+            if name.endswith(SEGMENT_SUFFIX)
+        )
+
+    @contextmanager
+    def _locked(self):
+        with self._thread_lock:
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self) -> None:
+        """Apply index lines appended since the last read, reloading after compaction."""
+        with self._thread_lock:
+            with open(self.index_path, "rb") as f:
+                inode = os.fstat(f.fileno()).st_ino
+                reload = inode != self._index_inode
+                f.seek(0 if reload else self._index_pos)
+                chunk = f.read()
+
+            # `contains` and `get` read the index without locking, so a reloaded
+            # index is built aside and swapped in whole
+            index = {} if reload else self._index
+            complete = chunk.rfind(b"\n") + 1
+            for line in chunk[:complete].decode().splitlines():
+                parts = line.split()
+                if len(parts) == 5 and parts[0] == "P":
+                    index[parts[1]] = (int(parts[2]), int(parts[3]), int(parts[4]))
+                elif len(parts) == 2 and parts[0] == "D":
+                    index.pop(parts[1], None)
+
+            if reload:
+                self._index, self._index_inode, self._index_pos = index, inode, 0
+            self._index_pos += complete
+
+    def _append_index(self, lines: list[str]) -> None:
+        # Only called under `_locked`, so everything past `_index_pos` is a
+        # line torn by a crashed writer; drop it or the new line is glued to it
+        with open(self.index_path, "r+b") as f:
+            f.truncate(self._index_pos)
+            f.seek(self._index_pos)
+            f.write("".join(lines).encode())
+            f.flush()
+        self._refresh()
+
+    def _append_blob(self, data: bytes) -> tuple[int, int]:
+        segments = self._segments()
+        segment = segments[-1] if segments else 1
+        segment_path = self._segment_path(segment)
+        offset = os.path.getsize(segment_path) if segments else 0
+        if offset and offset + len(data) > self.segment_size:
+            segment, offset = segment + 1, 0
+            segment_path = self._segment_path(segment)
+
+        with open(segment_path, "ab") as f:
+            f.write(data)
+            f.flush()
+        return segment, offset
+
+    def _lookup(self, file_hash: str) -> tuple[int, int, int] | None:
+        entry = self._index.get(file_hash)
+        if entry is None:
+            self._refresh()
+            entry = self._index.get(file_hash)
+        return entry
+
+    def contains(self, file_hash: str) -> bool:
+        return self._lookup(file_hash) is not None
+
+    def size(self, file_hash: str) -> int | None:
+        """Length of a packed blob, read from the index without touching segments."""
+        entry = self._lookup(file_hash)
+        return entry[2] if entry else None
+
+    def put(self, file_hash: str, data: bytes) -> bool:
+        """Store a blob, returns False if it is already packed."""
+        with self._locked():
+            if file_hash in self._index:
+                return False
+            segment, offset = self._append_blob(data)
+            self._append_index([f"P {file_hash} {segment} {offset} {len(data)}\n"])
+            logger.debug(f"Blob packed into segment {segment}, hash: {file_hash}")
+            return True
+
+    def durable_paths(self, file_hash: str) -> tuple[list[str], list[str]]:
+        """Files and directories to flush for a packed blob to survive a crash."""
+        files = [self.index_path]
+        entry = self._index.get(file_hash)
+        if entry is not None:
+            files.insert(0, self._segment_path(entry[0]))
+        return files, [self.root]
+
+    def get(self, file_hash: str) -> bytes | None:
+        for _ in range(2):
+            entry = self._lookup(file_hash)
+            if entry is None:
+                return None
+            segment, offset, length = entry
+            try:
+                with open(self._segment_path(segment), "rb") as f:
+                    return os.pread(f.fileno(), length, offset)
+            except FileNotFoundError:
+                # Segment was compacted away by another process
+                self._refresh()
+        return None
+
+    def delete(self, file_hash: str) -> bool:
+        with self._locked():
+            if file_hash not in self._index:
+                return False
+            self._append_index([f"D {file_hash}\n"])
+            logger.debug(f"Blob removed from pack index, hash: {file_hash}")
+            return True
+
+    def dead_ratios(self) -> dict[int, float]:
+        """Fraction of unreferenced bytes for every segment on disk."""
+        live: dict[int, int] = {}
+        for segment, _, length in self._index.values():
+            live[segment] = live.get(segment, 0) + length
+
+        ratios = {}
+        for segment in self._segments():
+            size = os.path.getsize(self._segment_path(segment))
+            ratios[segment] = 1 - live.get(segment, 0) / size if size else 1.0
+        return ratios
+
+    def compact(self) -> int:
+        """
+        Rewrite live blobs out of sealed segments that are mostly garbage.
+
+        Returns:
+            int: Number of segments removed
+        """
+        with self._locked():
+            segments = self._segments()
+            if not segments:
+                return 0
+            active = segments[-1]
+            victims = [
+                segment
+                for segment, ratio in self.dead_ratios().items()
+                if segment != active and ratio >= self.compaction_threshold
+            ]
+            if not victims:
+                return 0
+
+            index = dict(self._index)
+            written: set[int] = set()
+            for file_hash, (segment, offset, length) in self._index.items():
+                if segment not in victims:
+                    continue
+                with open(self._segment_path(segment), "rb") as f:
+                    data = os.pread(f.fileno(), length, offset)
+                new_segment, new_offset = self._append_blob(data)
+                index[file_hash] = (new_segment, new_offset, length)
+                written.add(new_segment)
+
+            # Copies must be durable before the segments holding the originals go
+            make_durable(
+                [self._segment_path(segment) for segment in sorted(written)],
+                [self.root],
+                DurabilityMode.FSYNC,
+            )
+
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(
+                    "".join(
+                        f"P {file_hash} {segment} {offset} {length}\n"
+                        for file_hash, (segment, offset, length) in index.items()
+                    ).encode()
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.index_path)
+            # The new index must survive a crash before its old segments go
+            make_durable([], [self.root], DurabilityMode.FSYNC)
+            self._refresh()
+
+            for segment in victims:
+                os.remove(self._segment_path(segment))
+            logger.info(f"Compacted pack segments: {victims}")
+            return len(victims)
+
+    def start_compaction(self, interval: float) -> threading.Thread:
+        """Run `compact` every `interval` seconds in a daemon thread."""
+
+        def run():
+            stop = threading.Event()
+            while not stop.wait(interval):
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"Pack compaction failed: {str(e)}")
+
+        thread = threading.Thread(target=run, name="pack-compaction", daemon=True)
+        thread.start()
+        return thread
+
+
+pack_store = (
+    PackStore(
+        root=StorageDir.PACK.path,
+        segment_size=settings.PACK_SEGMENT_SIZE,
+        max_file_size=settings.PACK_MAX_FILE_SIZE,
+        compaction_threshold=settings.PACK_COMPACTION_THRESHOLD,
+    )
+    if settings.PACK_STORE_ENABLED
+    else None
+)
+
+
+def is_packed(file_hash: str) -> bool:
+    return pack_store is not None and pack_store.contains(file_hash)
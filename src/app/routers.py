@@ -1,9 +1,14 @@
+import io
 import os
+import re
 import hashlib
+import itertools
+import time
+import tempfile
 from flask import request, send_file, Response
 
 from flask_restx import Resource
-from flask import Blueprint, send_from_directory
+from flask import Blueprint
 from flask_jwt_extended import (
     create_access_token,
     jwt_required,
@@ -11,17 +16,49 @@ from flask_jwt_extended import (
 )
 
 from src.app.docs_api import (
+    api,
     auth_ns,
     login_model,
     file_response_model,
     error_model,
     file_ns,
+    delta_upload_model,
+    share_link_model,
 )
 from src.db.models import User, File
 from src.db.data_base import SessionLocal
 from src.utils.custom_logger import get_logger
 from src.app._access_owner import file_owner_required
-from src.app.file_dir import get_file_path, allowed_file
+from src.app._admission import upload_admission_required
+from src.app.file_cache import file_cache
+from src.app.download_offload import (
+    get_download_mode,
+    offload_response,
+    direct_response,
+)
+from src.config.settings import settings
+from src.app.delta import DeltaError, compute_signature, apply_delta
+from src.app.file_dir import StorageDir, Tier, COLD_TIERS, allowed_file
+from src.app.tiering import CHUNK_SIZE, access_tracker, tiering_engine, open_blob
+from src.app.signed_urls import (
+    LINK_ID,
+    SignedUrlError,
+    mint,
+    verify,
+    parse_range,
+    revoked_links,
+)
+from src.app.storage import (
+    locate_blob,
+    blob_exists,
+    save_blob,
+    save_blob_file,
+    open_stored_blob,
+    open_seekable_blob,
+    read_packed_blob,
+    packed_blob_size,
+    delete_blob,
+)
 
 logger = get_logger(__name__)
 logger.propagate = False
@@ -30,6 +67,32 @@ logger.propagate = False
 auth_bp = Blueprint("auth", __name__)
 file_bp = Blueprint("file", __name__)
 
+SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+
+def _create_file_record(
+    username: str, file_hash: str, tier: str
+) -> tuple[dict[str, str], int]:
+    """Record a stored blob as a file owned by `username`
+
+    Returns:
+        tuple: Contains either the file hash or error message with status code
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter_by(username=username).first()
+        new_file = File(hash=file_hash, user_id=user.id, tier=tier)
+        db.add(new_file)
+        db.commit()
+        logger.info(f"File record created in DB, hash: {file_hash}")
+        return {"hash": file_hash}, 201
+    except Exception as db_error:
+        db.rollback()
+        logger.error(f"Database error during file upload: {str(db_error)}")
+        return {"error": "Database operation failed"}, 500
+    finally:
+        db.close()
+
 
 @auth_ns.route("/login")
 class Login(Resource):
@@ -106,6 +169,10 @@ class FileUpload(Resource):
     @jwt_required()
     @file_ns.doc(security="Bearer Auth")
     @file_ns.param("file", "File to upload", "formData", type="file", required=True)
+    @file_ns.response(413, "File too large")
+    @file_ns.response(429, "Too many uploads for this user")
+    @file_ns.response(503, "Server is overloaded")
+    @upload_admission_required
     def post(self) -> tuple[dict[str, str], int]:
         """Upload a file to the server
 
@@ -131,36 +198,114 @@ class FileUpload(Resource):
         try:
             file_data = file.read()
             file_hash = hashlib.sha256(file_data).hexdigest()
-            file_path = get_file_path(file_hash)
 
-            if os.path.exists(file_path):
+            if blob_exists(file_hash):
                 logger.info(f"File already exists, hash: {file_hash}")
                 return {"error": "File already exists"}, 409
 
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            with open(file_path, "wb") as f:
-                f.write(file_data)
-            logger.debug(f"File saved to disk at: {file_path}")
+            tier = save_blob(file_hash, file_data)
+            logger.debug(f"File saved to {tier} storage, hash: {file_hash}")
 
-            db = SessionLocal()
-            try:
-                user = db.query(User).filter_by(username=current_user).first()
-                new_file = File(hash=file_hash, user_id=user.id)
-                db.add(new_file)
-                db.commit()
-                logger.info(f"File record created in DB, hash: {file_hash}")
-                return {"hash": file_hash}, 201
-            except Exception as db_error:
-                db.rollback()
-                logger.error(f"Database error during file upload: {str(db_error)}")
-                return {"error": "Database operation failed"}, 500
-            finally:
-                db.close()
+            return _create_file_record(current_user, file_hash, tier)
         except Exception as e:
             logger.error(f"File upload failed: {str(e)}")
             return {"error": str(e)}, 500
 
 
+def _stream_blob(blob, length: int | None = None):
+    """Yield up to `length` bytes of an open blob in chunks, closing it after"""
+    with blob:
+        remaining = length
+        while remaining is None or remaining > 0:
+            size = CHUNK_SIZE if remaining is None else min(remaining, CHUNK_SIZE)
+            chunk = blob.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+def _serve_blob(
+    file_hash: str, tier: str, file_path: str
+) -> tuple[dict[str, str], int] | Response:
+    """Send a stored blob from whichever tier holds it
+
+    Args:
+        file_hash: SHA256 hash of the requested file
+        tier: Storage tier of the blob
+        file_path: Path to the blob for loose and cold tiers
+
+    Returns:
+        Response: File as attachment or error message with status code
+    """
+    download_name = f"file_{file_hash[:8]}"
+    download_mode = get_download_mode()
+    if download_mode.offloaded and tier == Tier.HOT.value:
+        logger.debug(f"Offloading download to proxy via {download_mode.value}")
+        return offload_response(file_path, download_name, download_mode)
+
+    if tier in COLD_TIERS:
+        logger.debug(f"Serving file from {tier} tier, hash: {file_hash}")
+        tiering_engine.request_promotion(file_hash)
+        if tier == Tier.COLD.value:
+            return send_file(file_path, as_attachment=True, download_name=download_name)
+
+        # A GzipFile exposes the compressed file's fileno(), which WSGI servers
+        # would sendfile() as is, so the decompressed bytes are streamed instead
+        response = Response(
+            _stream_blob(open_blob(file_path, tier)),
+            mimetype="application/octet-stream",
+        )
+        response.headers["Content-Disposition"] = (
+            f"attachment; filename={download_name}"
+        )
+        return response
+
+    if tier == Tier.PACKED.value:
+        size = packed_blob_size(file_hash)
+    else:
+        try:
+            size = os.path.getsize(file_path)
+        except FileNotFoundError:
+            size = None
+    if size is None:
+        logger.error(f"File not found in {tier} storage: {file_hash}")
+        return {"error": "File not found on disk"}, 404
+
+    # Files too large to cache are not looked up, so they do not count as misses
+    cacheable = file_cache.accepts(size)
+    file_data = file_cache.get(file_hash) if cacheable else None
+    if file_data is not None:
+        logger.debug(f"Serving file from memory cache, hash: {file_hash}")
+    elif tier == Tier.PACKED.value:
+        file_data = read_packed_blob(file_hash)
+        if file_data is None:
+            logger.error(f"File not found in pack store: {file_hash}")
+            return {"error": "File not found on disk"}, 404
+        file_cache.put(file_hash, file_data)
+    elif cacheable:
+        with open(file_path, "rb") as f:
+            file_data = f.read()
+        file_cache.put(file_hash, file_data)
+        logger.debug(f"File cached in memory, hash: {file_hash}")
+
+    if file_data is not None:
+        return send_file(
+            io.BytesIO(file_data),
+            mimetype="application/octet-stream",
+            as_attachment=True,
+            download_name=download_name,
+        )
+
+    try:
+        logger.debug(f"Attempting to send file from directory: {file_path}")
+        return direct_response(file_path, download_name)
+    except Exception as e:
+        logger.warning(f"Fallback to send_file for {file_path}: {str(e)}")
+        return send_file(file_path, as_attachment=True, download_name=download_name)
+
+
 @file_ns.route("/download/<string:file_hash>")
 class FileDownload(Resource):
     """Handles file downloads with owner verification and secure file delivery"""
@@ -192,24 +337,9 @@ class FileDownload(Resource):
         current_user = get_jwt_identity()
         logger.info("Download request for file %s by user %s", file_hash, current_user)
 
+        access_tracker.record(file_hash)
         try:
-            if not os.path.exists(file_path):
-                logger.error(f"File not found on disk: {file_path}")
-                return {"error": "File not found on disk"}, 404
-
-            try:
-                logger.debug(f"Attempting to send file from directory: {file_path}")
-                return send_from_directory(
-                    directory=os.path.dirname(file_path),
-                    path=os.path.basename(file_path),
-                    as_attachment=True,
-                    download_name=f"file_{file_hash[:8]}",
-                )
-            except Exception as e:
-                logger.warning(f"Fallback to send_file for {file_path}: {str(e)}")
-                return send_file(
-                    file_path, as_attachment=True, download_name=f"file_{file_hash[:8]}"
-                )
+            return _serve_blob(file_hash, file_record.tier, file_path)
         except Exception as e:
             logger.error(f"Download failed for {file_hash}: {str(e)}")
             return {"error": f"Download failed: {str(e)}"}, 500
@@ -242,14 +372,26 @@ class FileDelete(Resource):
 
         db = SessionLocal()
         try:
+            # Locking the row makes a concurrent tier migration wait for the
+            # delete and then discard its copy
+            file_record = (
+                db.query(File)
+                .filter(File.id == file_record.id)
+                .with_for_update()
+                .first()
+            )
+            if file_record is None:
+                logger.warning(f"File already deleted, hash: {file_hash}")
+                return {"error": "File not found"}, 404
+
             try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    logger.debug(f"File deleted from disk: {file_path}")
+                delete_blob(file_hash)
+                logger.debug(f"File deleted from storage, hash: {file_hash}")
             except OSError as e:
                 logger.error(f"Failed to delete file from disk: {str(e)}")
                 return {"error": f"Failed to delete file from disk: {str(e)}"}, 500
 
+            file_cache.discard(file_hash)
             db.delete(file_record)
             db.commit()
             logger.info(f"File record deleted from DB, hash: {file_hash}")
@@ -262,3 +404,343 @@ class FileDelete(Resource):
         finally:
             db.close()
             logger.debug("Database session closed for delete operation")
+
+
+def _delta_block_size(value) -> int | None:
+    if not isinstance(value, int) or isinstance(value, bool):
+        return None
+    if not settings.DELTA_MIN_BLOCK_SIZE <= value <= settings.DELTA_MAX_BLOCK_SIZE:
+        return None
+    return value
+
+
+@file_ns.route("/delta/<string:file_hash>")
+class FileDelta(Resource):
+    """Handles rsync-style uploads of a new file version against an owned base file"""
+
+    @jwt_required()
+    @file_ns.doc(security="Bearer Auth")
+    @file_ns.param("file_hash", "SHA256 hash of the base file")
+    @file_ns.param("block_size", "Signature block size in bytes", "query", type="integer")
+    @file_ns.response(200, "Success")
+    @file_ns.response(400, "Invalid block size", error_model)
+    @file_owner_required
+    def get(
+        self, file_hash: str, file_record: dict, file_path: str
+    ) -> tuple[dict, int]:
+        """Return block signatures of the base file
+
+        Args:
+            file_hash: SHA256 hash of the base file
+            file_record: File record from database (provided by decorator)
+            file_path: Path to file on disk (provided by decorator)
+
+        Returns:
+            tuple: Block size and per-block weak/strong checksums with status code
+        """
+        block_size = _delta_block_size(
+            request.args.get("block_size", settings.DELTA_BLOCK_SIZE, type=int)
+        )
+        if block_size is None:
+            logger.warning("Invalid block size in delta signature request")
+            return {"error": "Invalid block size"}, 400
+
+        try:
+            with open_stored_blob(file_hash, file_path, file_record.tier) as base:
+                blocks = compute_signature(base, block_size)
+        except Exception as e:
+            logger.error(f"Signature computation failed for {file_hash}: {str(e)}")
+            return {"error": str(e)}, 500
+
+        access_tracker.record(file_hash)
+        logger.info(f"Delta signature of {len(blocks)} blocks for {file_hash}")
+        return {"base_hash": file_hash, "block_size": block_size, "blocks": blocks}, 200
+
+    @jwt_required()
+    @file_ns.doc(security="Bearer Auth")
+    @file_ns.expect(delta_upload_model)
+    @file_ns.param("file_hash", "SHA256 hash of the base file")
+    @file_ns.response(201, "Success", file_response_model)
+    @file_ns.response(400, "Invalid delta", error_model)
+    @file_ns.response(409, "File already exists", error_model)
+    @file_ns.response(422, "Rebuilt file does not match hash", error_model)
+    @upload_admission_required
+    @file_owner_required
+    def post(
+        self, file_hash: str, file_record: dict, file_path: str
+    ) -> tuple[dict[str, str], int]:
+        """Rebuild a new file from the base file and delta instructions
+
+        Args:
+            file_hash: SHA256 hash of the base file
+            file_record: File record from database (provided by decorator)
+            file_path: Path to file on disk (provided by decorator)
+
+        Returns:
+            tuple: Contains either the new file hash or error message with status code
+        """
+        current_user = get_jwt_identity()
+        logger.info(f"Delta upload against {file_hash} by user: {current_user}")
+
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            logger.warning("Invalid JSON data in delta upload request")
+            return {"error": "Invalid JSON data"}, 400
+
+        new_hash = data.get("hash")
+        filename = data.get("filename")
+        instructions = data.get("instructions")
+        block_size = _delta_block_size(data.get("block_size"))
+        if (
+            not isinstance(new_hash, str)
+            or not isinstance(filename, str)
+            or not isinstance(instructions, list)
+        ):
+            logger.warning("Missing fields in delta upload request")
+            return {"error": "hash, filename and instructions required"}, 400
+        if block_size is None:
+            logger.warning("Invalid block size in delta upload request")
+            return {"error": "Invalid block size"}, 400
+        if not allowed_file(filename):
+            logger.warning(f"Disallowed file type attempted: {filename}")
+            return {"error": "File type not allowed"}, 400
+
+        new_hash = new_hash.lower()
+        if not SHA256_HEX.fullmatch(new_hash):
+            logger.warning("Invalid hash in delta upload request")
+            return {"error": "hash must be a SHA256 hex digest"}, 400
+        if blob_exists(new_hash):
+            logger.info(f"File already exists, hash: {new_hash}")
+            return {"error": "File already exists"}, 409
+
+        os.makedirs(StorageDir.STORE.path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".delta-", dir=StorageDir.STORE.path)
+        try:
+            with os.fdopen(fd, "wb") as out, open_seekable_blob(
+                file_hash, file_path, file_record.tier
+            ) as base:
+                digest, size = apply_delta(
+                    base, block_size, instructions, out, settings.MAX_UPLOAD_SIZE
+                )
+
+            if digest != new_hash:
+                logger.warning(f"Delta rebuilt {digest}, expected {new_hash}")
+                return {"error": "Rebuilt file does not match hash"}, 422
+
+            tier = save_blob_file(new_hash, tmp_path, size)
+            logger.debug(f"Delta file saved to {tier} storage, hash: {new_hash}")
+            return _create_file_record(current_user, new_hash, tier)
+        except DeltaError as e:
+            logger.warning(f"Invalid delta against {file_hash}: {str(e)}")
+            return {"error": str(e)}, 400
+        except Exception as e:
+            logger.error(f"Delta upload failed: {str(e)}")
+            return {"error": str(e)}, 500
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+@file_ns.route("/share/<string:file_hash>")
+class FileShare(Resource):
+    """Mints signed, expiring download links for an owned file"""
+
+    @jwt_required()
+    @file_ns.doc(security="Bearer Auth")
+    @file_ns.expect(share_link_model)
+    @file_ns.param("file_hash", "SHA256 hash of the file to share")
+    @file_ns.response(201, "Success")
+    @file_ns.response(400, "Invalid expiry or range", error_model)
+    @file_ns.response(503, "Signed links are not configured", error_model)
+    @file_owner_required
+    def post(
+        self, file_hash: str, file_record: dict, file_path: str
+    ) -> tuple[dict[str, str | int], int]:
+        """Create a signed download link
+
+        Args:
+            file_hash: SHA256 hash of the file to share
+            file_record: File record from database (provided by decorator)
+            file_path: Path to file on disk (provided by decorator)
+
+        Returns:
+            tuple: Link URL, link id and expiry or error message with status code
+        """
+        current_user = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+
+        ttl = data.get("expires_in", settings.DOWNLOAD_URL_DEFAULT_TTL)
+        if (
+            not isinstance(ttl, int)
+            or isinstance(ttl, bool)
+            or not 0 < ttl <= settings.DOWNLOAD_URL_MAX_TTL
+        ):
+            logger.warning(f"Invalid link expiry requested: {ttl}")
+            return {"error": "Invalid expires_in"}, 400
+
+        byte_range = data.get("range") or ""
+        try:
+            if not isinstance(byte_range, str):
+                raise SignedUrlError("Invalid byte range", 400)
+            parse_range(byte_range)
+        except SignedUrlError as e:
+            logger.warning(f"Invalid link range requested: {byte_range}")
+            return {"error": str(e)}, e.status
+
+        try:
+            params = mint(file_hash, ttl, byte_range)
+        except SignedUrlError as e:
+            logger.error(f"Cannot create download link: {str(e)}")
+            return {"error": str(e)}, e.status
+        url = api.url_for(SignedDownload, file_hash=file_hash, **params)
+        logger.info(f"Download link {params['l']} for {file_hash} by {current_user}")
+        return {
+            "url": url,
+            "link_id": params["l"],
+            "expires_at": int(params["e"]),
+        }, 201
+
+
+@file_ns.route("/share/<string:file_hash>/<string:link_id>")
+class FileShareRevoke(Resource):
+    """Revokes signed download links before they expire"""
+
+    @jwt_required()
+    @file_ns.doc(security="Bearer Auth")
+    @file_ns.response(200, "Success")
+    @file_ns.response(400, "Invalid link id", error_model)
+    @file_owner_required
+    def delete(
+        self, file_hash: str, link_id: str, file_record: dict, file_path: str
+    ) -> tuple[dict[str, str], int]:
+        """Revoke a signed download link
+
+        Args:
+            file_hash: SHA256 hash of the shared file
+            link_id: Id of the link returned when it was created
+            file_record: File record from database (provided by decorator)
+            file_path: Path to file on disk (provided by decorator)
+
+        Returns:
+            tuple: Success message with status code
+        """
+        if not LINK_ID.fullmatch(link_id):
+            logger.warning(f"Invalid link id in revocation request: {link_id!r}")
+            return {"error": "Invalid link id"}, 400
+
+        revoked_links.revoke(
+            f"{file_hash}:{link_id}", int(time.time()) + settings.DOWNLOAD_URL_MAX_TTL
+        )
+        logger.info(f"Download link {link_id} for {file_hash} revoked")
+        return {"message": "Link revoked"}, 200
+
+
+def _serve_blob_range(
+    file_hash: str, tier: str, file_path: str, start: int, end: int
+) -> tuple[dict[str, str], int] | Response:
+    """Send the inclusive byte range `start`-`end` of a stored blob"""
+    blob = open_stored_blob(file_hash, file_path, tier)
+    size = None if tier == Tier.COLD_GZIP.value else blob.seek(0, io.SEEK_END)
+    if size is not None:
+        if start >= size:
+            blob.close()
+            return {"error": "Range not satisfiable"}, 416
+        end = min(end, size - 1)
+    blob.seek(start)
+
+    body = _stream_blob(blob, end - start + 1)
+    if size is None:
+        # The length of a gzip stream is only known once it is decompressed,
+        # so check there is data at `start` before committing to a 206
+        head = next(body, None)
+        if head is None:
+            body.close()
+            return {"error": "Range not satisfiable"}, 416
+        body = itertools.chain([head], body)
+
+    response = Response(
+        body,
+        status=206,
+        mimetype="application/octet-stream",
+    )
+    response.headers["Content-Range"] = f"bytes {start}-{end}/{size or '*'}"
+    if size is not None:
+        response.headers["Content-Length"] = str(end - start + 1)
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename=file_{file_hash[:8]}"
+    )
+    return response
+
+
+@file_ns.route("/s/<string:file_hash>")
+class SignedDownload(Resource):
+    """Serves files for signed links without touching the database"""
+
+    @file_ns.doc(
+        security=[],
+        params={
+            "e": "Expiry timestamp",
+            "l": "Link id",
+            "r": "Signed byte range",
+            "s": "Signature",
+        },
+    )
+    @file_ns.response(200, "File downloaded successfully")
+    @file_ns.response(206, "Signed byte range downloaded successfully")
+    @file_ns.response(403, "Invalid signature", error_model)
+    @file_ns.response(410, "Link expired or revoked", error_model)
+    @file_ns.response(503, "Signed links are not configured", error_model)
+    def get(self, file_hash: str) -> tuple[dict[str, str], int] | Response:
+        """Download a file through a signed link
+
+        Args:
+            file_hash: SHA256 hash of the requested file
+
+        Returns:
+            Response: File or byte range with cache headers or error message
+        """
+        try:
+            expires, byte_range = verify(file_hash, request.args)
+        except SignedUrlError as e:
+            logger.warning(f"Signed download of {file_hash} rejected: {str(e)}")
+            return {"error": str(e)}, e.status
+
+        located = locate_blob(file_hash)
+        if located is None:
+            logger.error(f"File not found on disk for signed link: {file_hash}")
+            return {"error": "File not found on disk"}, 404
+        tier, file_path = located
+        access_tracker.record(file_hash)
+
+        try:
+            if byte_range is None:
+                response = _serve_blob(file_hash, tier, file_path)
+            else:
+                response = _serve_blob_range(file_hash, tier, file_path, *byte_range)
+        except Exception as e:
+            logger.error(f"Signed download failed for {file_hash}: {str(e)}")
+            return {"error": f"Download failed: {str(e)}"}, 500
+
+        if isinstance(response, Response):
+            max_age = max(
+                0, min(settings.DOWNLOAD_URL_CACHE_MAX_AGE, expires - int(time.time()))
+            )
+            response.headers["Cache-Control"] = f"public, max-age={max_age}, immutable"
+            response.headers["ETag"] = f'"{file_hash}"'
+        return response
+
+
+@file_ns.route("/cache/stats")
+class FileCacheStats(Resource):
+    """Exposes hit-ratio and eviction metrics of the download cache"""
+
+    @jwt_required()
+    @file_ns.doc(security="Bearer Auth")
+    @file_ns.response(200, "Success")
+    def get(self) -> tuple[dict[str, int | float], int]:
+        """Return download cache metrics
+
+        Returns:
+            tuple: Cache metrics with status code
+        """
+        return file_cache.stats(), 200
@@ -0,0 +1,181 @@
+import os
+import re
+import hmac
+import time
+import fcntl
+import base64
+import hashlib
+import secrets
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from src.config.settings import settings
+from src.utils.custom_logger import get_logger
+
+logger = get_logger(__name__)
+logger.propagate = False
+
+# Link ids are `secrets.token_urlsafe(9)`: 9 random bytes, 12 base64url chars
+LINK_ID = re.compile(r"[A-Za-z0-9_-]{12}")
+
+# Every worker process must sign with the same key, so there is no random
+# per-process fallback; signed links are disabled until a secret is set
+secret = (settings.DOWNLOAD_URL_SECRET or "").encode() or None
+if secret is None:
+    logger.warning("DOWNLOAD_URL_SECRET is not set, signed links are disabled")
+
+
+class SignedUrlError(Exception):
+    """Raised when a signed download URL is malformed, forged, expired or revoked"""
+
+    def __init__(self, message: str, status: int = 403):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_range(value: str | None) -> tuple[int, int] | None:
+    """Parse an inclusive `start-end` byte range."""
+    if not value:
+        return None
+    start, sep, end = value.partition("-")
+    if not sep or not start.isdigit() or not end.isdigit() or int(end) < int(start):
+        raise SignedUrlError("Invalid byte range", 400)
+    return int(start), int(end)
+
+
+def sign(file_hash: str, expires: int, link_id: str, byte_range: str = "") -> str:
+    if secret is None:
+        raise SignedUrlError("Signed download links are not configured", 503)
+    message = f"{file_hash}:{expires}:{link_id}:{byte_range}".encode()
+    digest = hmac.new(secret, message, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def mint(file_hash: str, ttl: int, byte_range: str = "") -> dict[str, str]:
+    """
+    Create query parameters of a download link for one hash.
+
+    Returns:
+        dict: `e` expiry timestamp, `l` link id, optional `r` range, `s` signature
+    """
+    expires = int(time.time()) + ttl
+    link_id = secrets.token_urlsafe(9)
+    params = {"e": str(expires), "l": link_id}
+    if byte_range:
+        params["r"] = byte_range
+    params["s"] = sign(file_hash, expires, link_id, byte_range)
+    return params
+
+
+class RevocationList:
+    """
+    Links cut off before their expiry, shared through an append-only file.
+
+    Each line is `<file_hash>:<link_id> <expires>`. Entries are dropped once
+    the link would have expired anyway, and the file is rewritten when it
+    holds mostly such dead entries. Appends and rewrites are serialized
+    across processes by an flock on `<path>.lock`; readers reload the file
+    whenever its inode, size or mtime moves.
+
+    Args:
+        path (str): File the revoked links are persisted to
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock_path = path + ".lock"
+        self._revoked: dict[str, int] = {}
+        self._version: tuple[int, int, int] | None = None
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _reload(self) -> None:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if version == self._version:
+            return
+
+        now = int(time.time())
+        revoked: dict[str, int] = {}
+        lines = 0
+        with open(self.path) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2 or not parts[1].isdigit():
+                    continue
+                lines += 1
+                if int(parts[1]) > now:
+                    revoked[parts[0]] = int(parts[1])
+        self._revoked, self._version, self._lines = revoked, version, lines
+
+    def is_revoked(self, key: str) -> bool:
+        with self._lock:
+            self._reload()
+            return key in self._revoked
+
+    def revoke(self, key: str, expires: int) -> None:
+        # Keys are stored one per line next to their expiry
+        if not re.fullmatch(r"\S+", key):
+            raise ValueError(f"Invalid revocation key: {key!r}")
+        with self._lock, self._locked():
+            with open(self.path, "a") as f:
+                f.write(f"{key} {expires}\n")
+            self._reload()
+            if self._lines > 2 * len(self._revoked) + 100:
+                self._compact()
+
+    def _compact(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(self.path) + ".",
+            dir=os.path.dirname(self.path) or ".",
+        )
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.writelines(f"{k} {v}\n" for k, v in self._revoked.items())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._reload()
+
+
+revoked_links = RevocationList(settings.DOWNLOAD_URL_REVOCATION_FILE)
+
+
+def verify(file_hash: str, args) -> tuple[int, tuple[int, int] | None]:
+    """
+    Check a signed download link without touching the database.
+
+    Args:
+        file_hash: Hash from the URL path
+        args: Query parameters of the request
+
+    Returns:
+        tuple: Expiry timestamp and the signed byte range, if any
+    """
+    expires, link_id = args.get("e", ""), args.get("l", "")
+    byte_range, signature = args.get("r", ""), args.get("s", "")
+    if not expires.isdigit() or not link_id or not signature:
+        raise SignedUrlError("Invalid download link", 400)
+
+    expected = sign(file_hash, int(expires), link_id, byte_range)
+    if not hmac.compare_digest(expected, signature):
+        raise SignedUrlError("Invalid signature")
+    if int(expires) <= time.time():
+        raise SignedUrlError("Download link expired", 410)
+    if revoked_links.is_revoked(f"{file_hash}:{link_id}"):
+        raise SignedUrlError("Download link revoked", 410)
+    return int(expires), parse_range(byte_range)
@@ -0,0 +1,154 @@
+import io
+import os
+import shutil
+import tempfile
+from typing import BinaryIO
+
+from src.app.file_dir import StorageDir, Tier, get_file_path, resolve_file_path
+from src.app.pack_store import pack_store, is_packed
+from src.app.tiering import CHUNK_SIZE, open_blob
+from src.app.durability import make_durable
+
+
+def locate_blob(file_hash: str) -> tuple[str, str] | None:
+    """
+    Find a blob without consulting the database.
+
+    Returns:
+        tuple: (tier, path) of the stored blob, or None if it is not stored
+    """
+    if is_packed(file_hash):
+        return Tier.PACKED.value, get_file_path(file_hash)
+    for tier in (Tier.HOT.value, Tier.COLD.value, Tier.COLD_GZIP.value):
+        file_path = resolve_file_path(file_hash, tier)
+        if file_path and os.path.exists(file_path):
+            return tier, file_path
+    return None
+
+
+def blob_exists(file_hash: str) -> bool:
+    return locate_blob(file_hash) is not None
+
+
+def _make_blob_dir(file_path: str) -> list[str]:
+    """Create the directory of a loose blob, returning directories to flush."""
+    blob_dir = os.path.dirname(file_path)
+    try:
+        os.makedirs(blob_dir)
+    except FileExistsError:
+        return [blob_dir]
+    return [blob_dir, StorageDir.STORE.path]
+
+
+def save_blob(file_hash: str, file_data: bytes) -> str:
+    """
+    Store content in the pack store if it is small enough, else as its own file.
+
+    Returns once the content is durable according to `DURABILITY_MODE`. Loose
+    files are written aside and renamed into place, so a crash never leaves a
+    truncated blob under its final name.
+
+    Returns:
+        str: Tier the blob was stored in, to be recorded on its `File` row
+    """
+    if pack_store is not None and pack_store.accepts(len(file_data)):
+        pack_store.put(file_hash, file_data)
+        make_durable(*pack_store.durable_paths(file_hash))
+        return Tier.PACKED.value
+
+    file_path = get_file_path(file_hash)
+    dirs = _make_blob_dir(file_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=".upload-", dir=dirs[0])
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(file_data)
+        # The data must be durable before the rename makes it visible
+        make_durable([tmp_path], [])
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    make_durable([], dirs)
+    return Tier.HOT.value
+
+
+def save_blob_file(file_hash: str, tmp_path: str, size: int) -> str:
+    """
+    Store content already written to `tmp_path`, moving it into place if possible.
+
+    `tmp_path` must be on the same filesystem as the storage directory.
+
+    Returns:
+        str: Tier the blob was stored in, to be recorded on its `File` row
+    """
+    if pack_store is not None and pack_store.accepts(size):
+        with open(tmp_path, "rb") as f:
+            tier = save_blob(file_hash, f.read())
+        os.remove(tmp_path)
+        return tier
+
+    file_path = get_file_path(file_hash)
+    dirs = _make_blob_dir(file_path)
+    os.replace(tmp_path, file_path)
+    make_durable([file_path], dict.fromkeys(dirs + [os.path.dirname(tmp_path)]))
+    return Tier.HOT.value
+
+
+def open_stored_blob(file_hash: str, file_path: str, tier: str) -> BinaryIO:
+    """Open a stored blob of any tier as a seekable binary file."""
+    if tier == Tier.PACKED.value:
+        file_data = read_packed_blob(file_hash)
+        if file_data is None:
+            raise FileNotFoundError(f"Blob not found in pack store: {file_hash}")
+        return io.BytesIO(file_data)
+    return open_blob(file_path, tier)
+
+
+def open_seekable_blob(file_hash: str, file_path: str, tier: str) -> BinaryIO:
+    """
+    Open a stored blob for random access.
+
+    Seeking backwards in a gzip stream restarts decompression from the top,
+    so cold-gzip blobs are decompressed into an anonymous temporary file.
+    """
+    if tier != Tier.COLD_GZIP.value:
+        return open_stored_blob(file_hash, file_path, tier)
+
+    tmp = tempfile.TemporaryFile(dir=StorageDir.STORE.path)
+    try:
+        with open_blob(file_path, tier) as src:
+            shutil.copyfileobj(src, tmp, CHUNK_SIZE)
+        tmp.seek(0)
+    except Exception:
+        tmp.close()
+        raise
+    return tmp
+
+
+def read_packed_blob(file_hash: str) -> bytes | None:
+    if pack_store is None:
+        return None
+    return pack_store.get(file_hash)
+
+
+def packed_blob_size(file_hash: str) -> int | None:
+    if pack_store is None:
+        return None
+    return pack_store.size(file_hash)
+
+
+def delete_blob(file_hash: str) -> None:
+    """
+    Remove a blob from every tier.
+
+    Copies in tiers other than the recorded one can be left behind by a tier
+    migration that raced with the delete or was interrupted by a crash.
+    """
+    if pack_store is not None:
+        pack_store.delete(file_hash)
+
+    for tier in (Tier.HOT.value, Tier.COLD.value, Tier.COLD_GZIP.value):
+        file_path = resolve_file_path(file_hash, tier)
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
@@ -0,0 +1,419 @@
+import os
+import gzip
+import time
+import fcntl
+import atexit
+import threading
+from datetime import timedelta
+from contextlib import contextmanager
+
+from sqlalchemy import func
+
+from src.db.models import File
+from src.db.data_base import SessionLocal
+from src.config.settings import settings
+from src.app.file_dir import StorageDir, Tier, COLD_TIERS, resolve_file_path
+from src.utils.custom_logger import get_logger
+
+logger = get_logger(__name__)
+logger.propagate = False
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class AccessTracker:
+    """
+    Buffers file reads in memory and writes them to the database in batches.
+
+    Recording never touches the database; a full buffer only wakes the
+    background flusher early.
+
+    Args:
+        flush_interval (float): Seconds between background flushes
+        max_pending (int): Number of distinct buffered files that forces a flush
+    """
+
+    def __init__(self, flush_interval: float, max_pending: int):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._full = threading.Event()
+
+    def record(self, file_hash: str) -> None:
+        with self._lock:
+            self._pending[file_hash] = self._pending.get(file_hash, 0) + 1
+            if len(self._pending) >= self.max_pending:
+                self._full.set()
+
+    def flush(self) -> int:
+        """
+        Write buffered read counts and access times in one transaction.
+
+        Returns:
+            int: Number of files updated
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            for file_hash, count in pending.items():
+                db.query(File).filter(File.hash == file_hash).update(
+                    {
+                        File.read_count: File.read_count + count,
+                        File.last_accessed_at: func.now(),
+                    },
+                    synchronize_session=False,
+                )
+            db.commit()
+            logger.debug(f"Flushed access stats for {len(pending)} files")
+            return len(pending)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Failed to flush access stats: {str(e)}")
+            with self._lock:
+                for file_hash, count in pending.items():
+                    self._pending[file_hash] = self._pending.get(file_hash, 0) + count
+            return 0
+        finally:
+            db.close()
+
+    def start(self) -> threading.Thread:
+        """Flush every `flush_interval` seconds in a daemon thread and on exit."""
+
+        def run():
+            while True:
+                self._full.wait(self.flush_interval)
+                self._full.clear()
+                self.flush()
+
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=run, name="access-tracker", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.flush)
+        return self._thread
+
+
+def copy_blob(
+    src_path: str,
+    dst_path: str,
+    src_tier: str,
+    dst_tier: str,
+    max_bytes_per_second: int,
+) -> int:
+    """
+    Copy a blob between tiers, (de)compressing as needed.
+
+    The copy is written to a temporary file, fsynced and renamed into place,
+    so `dst_path` either does not exist or holds the complete blob.
+
+    Returns:
+        int: Number of uncompressed bytes copied
+    """
+    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+    tmp_path = dst_path + ".tmp"
+    copied = 0
+    started_at = time.monotonic()
+
+    opener = gzip.open if src_tier == Tier.COLD_GZIP.value else open
+    try:
+        with opener(src_path, "rb") as src, open(tmp_path, "wb") as raw:
+            dst = (
+                gzip.GzipFile(fileobj=raw, mode="wb")
+                if dst_tier == Tier.COLD_GZIP.value
+                else raw
+            )
+            while chunk := src.read(CHUNK_SIZE):
+                dst.write(chunk)
+                copied += len(chunk)
+                ahead = copied / max_bytes_per_second - (
+                    time.monotonic() - started_at
+                )
+                if ahead > 0:
+                    time.sleep(ahead)
+            if dst is not raw:
+                dst.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    dir_fd = os.open(os.path.dirname(dst_path), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+    return copied
+
+
+def open_blob(file_path: str, tier: str):
+    """Open a stored blob for reading, transparently decompressing cold blobs."""
+    if tier == Tier.COLD_GZIP.value:
+        return gzip.open(file_path, "rb")
+    return open(file_path, "rb")
+
+
+class TieringEngine:
+    """
+    Moves blobs not read for a while to the cold storage root and back.
+
+    A move copies the blob without holding any database lock, then locks the
+    row only to check it still points at the copied tier and switch it. If the
+    row changed or vanished in the meantime the copy is discarded.
+
+    Before copying, both the source and the destination path are queued in
+    `<state_dir>/retired.log` for removal `retire_delay` seconds later. When
+    an entry is due, its path is removed unless it is the one the row now
+    points at. The old copy thus survives long enough for downloads that
+    resolved its path just before the switch, and copies left behind by a
+    crash at any point are cleaned up by whichever worker's engine runs next.
+    Blobs in the pack store are never tiered.
+
+    Moves and the queue are serialized across worker processes by an flock on
+    `<state_dir>/lock`, so engines in several workers neither duplicate
+    copies nor exceed the throughput limit together.
+
+    Args:
+        cold_after (timedelta): Idle time after which a hot blob is demoted
+        compress (bool): Whether cold blobs are stored gzip-compressed
+        max_bytes_per_second (int): Copy throughput limit for migrations
+        batch_size (int): Maximum number of demotions per run
+        state_dir (str): Directory for the lock and the removal queue
+        retire_delay (float): Seconds an old copy is kept after a move
+    """
+
+    def __init__(
+        self,
+        cold_after: timedelta,
+        compress: bool,
+        max_bytes_per_second: int,
+        batch_size: int,
+        state_dir: str,
+        retire_delay: float = 60,
+    ):
+        self.cold_after = cold_after
+        self.cold_tier = Tier.COLD_GZIP.value if compress else Tier.COLD.value
+        self.max_bytes_per_second = max_bytes_per_second
+        self.batch_size = batch_size
+        self.state_dir = state_dir
+        self.lock_path = os.path.join(state_dir, "lock")
+        self.retired_path = os.path.join(state_dir, "retired.log")
+        self.retire_delay = retire_delay
+        self._promotions: set[str] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def request_promotion(self, file_hash: str) -> None:
+        with self._lock:
+            self._promotions.add(file_hash)
+        self._wakeup.set()
+
+    @contextmanager
+    def _exclusive(self):
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _current_tier(file_hash: str) -> str | None:
+        db = SessionLocal()
+        try:
+            return db.query(File.tier).filter(File.hash == file_hash).scalar()
+        finally:
+            db.close()
+
+    def _switch_tier(self, file_hash: str, from_tier: str, to_tier: str) -> bool:
+        db = SessionLocal()
+        try:
+            file_record = (
+                db.query(File).filter(File.hash == file_hash).with_for_update().first()
+            )
+            if file_record is None or file_record.tier != from_tier:
+                db.rollback()
+                return False
+            file_record.tier = to_tier
+            db.commit()
+            return True
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _read_retired(self) -> list[tuple[float, str, str]]:
+        try:
+            with open(self.retired_path) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for line in lines:
+            parts = line.split(" ", 2)
+            if len(parts) == 3:
+                try:
+                    entries.append((float(parts[0]), parts[1], parts[2]))
+                except ValueError:
+                    continue
+        return entries
+
+    def _retire(self, file_hash: str, paths: list[str]) -> None:
+        """Queue `paths` for removal; only called under `_exclusive`."""
+        remove_at = time.time() + self.retire_delay
+        with open(self.retired_path, "a") as f:
+            f.writelines(f"{remove_at} {file_hash} {path}\n" for path in paths)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _move(self, file_hash: str, from_tiers: set[str], to_tier: str) -> bool:
+        with self._exclusive():
+            try:
+                from_tier = self._current_tier(file_hash)
+                if from_tier not in from_tiers:
+                    return False
+
+                src_path = resolve_file_path(file_hash, from_tier)
+                dst_path = resolve_file_path(file_hash, to_tier)
+                self._retire(file_hash, [src_path, dst_path])
+                copied = copy_blob(
+                    src_path,
+                    dst_path,
+                    from_tier,
+                    to_tier,
+                    self.max_bytes_per_second,
+                )
+                if not self._switch_tier(file_hash, from_tier, to_tier):
+                    logger.info(f"File changed during migration, hash: {file_hash}")
+                    os.remove(dst_path)
+                    return False
+            except Exception as e:
+                logger.error(f"Tier migration failed for {file_hash}: {str(e)}")
+                return False
+
+        logger.info(f"Moved {copied} bytes to {to_tier} tier, hash: {file_hash}")
+        return True
+
+    def remove_retired(self) -> int:
+        """
+        Remove queued copies whose grace period is over.
+
+        A copy is kept if it is the one its row currently points at.
+
+        Returns:
+            int: Number of copies removed
+        """
+        removed = 0
+        with self._exclusive():
+            now = time.time()
+            pending = []
+            for entry in self._read_retired():
+                remove_at, file_hash, file_path = entry
+                if remove_at > now:
+                    pending.append(entry)
+                    continue
+                try:
+                    tier = self._current_tier(file_hash)
+                    if tier and resolve_file_path(file_hash, tier) == file_path:
+                        continue
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
+                        removed += 1
+                except Exception as e:
+                    logger.error(f"Failed to remove old copy {file_path}: {str(e)}")
+                    pending.append(entry)
+
+            tmp_path = self.retired_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.writelines(f"{r} {h} {p}\n" for r, h, p in pending)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.retired_path)
+        return removed
+
+    def _next_retirement(self) -> float | None:
+        """Wall-clock time the earliest queued copy becomes due."""
+        return min((entry[0] for entry in self._read_retired()), default=None)
+
+    def promote_pending(self) -> int:
+        with self._lock:
+            promotions, self._promotions = self._promotions, set()
+        return sum(
+            self._move(file_hash, COLD_TIERS, Tier.HOT.value)
+            for file_hash in promotions
+        )
+
+    def demote_idle(self) -> int:
+        db = SessionLocal()
+        try:
+            idle_since = func.now() - self.cold_after
+            candidates = (
+                db.query(File.hash)
+                .filter(
+                    File.tier == Tier.HOT.value,
+                    func.coalesce(File.last_accessed_at, File.uploaded_at)
+                    < idle_since,
+                )
+                .order_by(func.coalesce(File.last_accessed_at, File.uploaded_at))
+                .limit(self.batch_size)
+                .all()
+            )
+        finally:
+            db.close()
+
+        return sum(
+            self._move(file_hash, {Tier.HOT.value}, self.cold_tier)
+            for (file_hash,) in candidates
+        )
+
+    def start(self, interval: float) -> threading.Thread:
+        """Serve promotions as they arrive and demote idle blobs every `interval` seconds."""
+
+        def run():
+            next_demotion = time.monotonic()
+            while True:
+                timeout = next_demotion - time.monotonic()
+                next_retirement = self._next_retirement()
+                if next_retirement is not None:
+                    timeout = min(timeout, next_retirement - time.time())
+                self._wakeup.wait(max(0.0, timeout))
+                self._wakeup.clear()
+                try:
+                    self.promote_pending()
+                    if time.monotonic() >= next_demotion:
+                        self.demote_idle()
+                        next_demotion = time.monotonic() + interval
+                    self.remove_retired()
+                except Exception as e:
+                    logger.error(f"Tiering run failed: {str(e)}")
+
+        thread = threading.Thread(target=run, name="tiering-engine", daemon=True)
+        thread.start()
+        return thread
+
+
+access_tracker = AccessTracker(
+    flush_interval=settings.ACCESS_FLUSH_INTERVAL,
+    max_pending=settings.ACCESS_FLUSH_MAX_PENDING,
+)
+
+tiering_engine = TieringEngine(
+    cold_after=timedelta(days=settings.TIERING_COLD_AFTER_DAYS),
+    compress=settings.TIERING_COMPRESS,
+    max_bytes_per_second=settings.TIERING_MAX_BYTES_PER_SECOND,
+    batch_size=settings.TIERING_BATCH_SIZE,
+    state_dir=StorageDir.COLD.path,
+    retire_delay=settings.TIERING_RETIRE_DELAY,
+)
@@ -1,5 +1,7 @@
+from typing import Literal
 from urllib.parse import quote_plus
 
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -7,6 +9,8 @@ class Settings(BaseSettings):
     APP_DEBUG: bool
     APP_HOST: str
     APP_PORT: str
+    # gunicorn reads the same variable as its number of worker processes
+    WEB_CONCURRENCY: int = 1
 
     # db
     DB_HOST: str | int
@@ -15,6 +19,62 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
 
+    # uploads
+    MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024
+    UPLOAD_MAX_CONCURRENT_PER_USER: int = 2
+    UPLOAD_MAX_CONCURRENT_TOTAL: int = 16
+    UPLOAD_USER_BANDWIDTH: int = 20 * 1024 * 1024
+    UPLOAD_TOTAL_BANDWIDTH: int = 200 * 1024 * 1024
+    UPLOAD_ADMISSION_STATE_FILE: str = "upload_admission.json"
+
+    # downloads, the cache budget is shared by all WEB_CONCURRENCY workers
+    DOWNLOAD_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    DOWNLOAD_CACHE_MAX_FILE_SIZE: int = 1024 * 1024
+    DOWNLOAD_MODE: Literal["direct", "x-accel-redirect", "x-sendfile"] = "direct"
+    DOWNLOAD_ACCEL_PREFIX: str = "/internal/store/"
+
+    # pack storage for small files
+    PACK_STORE_ENABLED: bool = False
+    PACK_MAX_FILE_SIZE: int = 64 * 1024
+    PACK_SEGMENT_SIZE: int = 64 * 1024 * 1024
+    PACK_COMPACTION_THRESHOLD: float = 0.5
+    PACK_COMPACTION_INTERVAL: int = 600
+
+    # hot/cold tiering
+    ACCESS_FLUSH_INTERVAL: int = 30
+    ACCESS_FLUSH_MAX_PENDING: int = 1000
+    TIERING_ENABLED: bool = False
+    TIERING_COLD_ROOT: str = "cold"
+    TIERING_COLD_AFTER_DAYS: int = 30
+    TIERING_COMPRESS: bool = True
+    TIERING_MAX_BYTES_PER_SECOND: int = 20 * 1024 * 1024
+    TIERING_BATCH_SIZE: int = 100
+    TIERING_INTERVAL: int = 3600
+    TIERING_RETIRE_DELAY: int = 60
+
+    # write durability
+    DURABILITY_MODE: Literal["none", "fsync", "group"] = "fsync"
+    DURABILITY_GROUP_DELAY_MS: float = 0
+    DURABILITY_GROUP_MAX_BATCH: int = 256
+    DURABILITY_GROUP_FLUSH_THREADS: int = 8
+
+    # signed download urls
+    DOWNLOAD_URL_SECRET: str | None = None
+    DOWNLOAD_URL_DEFAULT_TTL: int = 3600
+    DOWNLOAD_URL_MAX_TTL: int = 7 * 24 * 3600
+    DOWNLOAD_URL_CACHE_MAX_AGE: int = 300
+    DOWNLOAD_URL_REVOCATION_FILE: str = "revoked_links.log"
+
+    # delta uploads
+    DELTA_BLOCK_SIZE: int = 64 * 1024
+    DELTA_MIN_BLOCK_SIZE: int = 1024
+    DELTA_MAX_BLOCK_SIZE: int = 4 * 1024 * 1024
+
+    @field_validator("DOWNLOAD_MODE", "DURABILITY_MODE", mode="before")
+    @classmethod
+    def lowercase_mode(cls, value):
+        return value.lower() if isinstance(value, str) else value
+
     @property
     def DB_URL(self) -> str:
         password = quote_plus(self.DB_PASSWORD)
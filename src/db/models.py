@@ -29,5 +29,8 @@ class File(Base):
     hash = Column(String(64), unique=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"))
     uploaded_at = Column(DateTime, server_default=func.now())
+    last_accessed_at = Column(DateTime)
+    read_count = Column(Integer, nullable=False, server_default="0")
+    tier = Column(String(16), nullable=False, server_default="hot")
 
     user = relationship("User", back_populates="files")
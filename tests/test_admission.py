@@ -0,0 +1,156 @@
+import os
+import json
+
+import pytest
+from flask import jsonify
+from unittest.mock import patch
+from flask_jwt_extended import create_access_token, jwt_required
+
+from src.app._admission import (
+    TokenBucket,
+    UploadAdmission,
+    upload_admission_required,
+)
+
+
+@pytest.fixture
+def make_admission(tmp_path):
+    def make(**overrides):
+        params = dict(
+            state_path=str(tmp_path / "admission.json"),
+            max_concurrent_per_user=1,
+            max_concurrent_total=2,
+            user_bandwidth=100,
+            total_bandwidth=1000,
+            max_upload_size=100,
+        )
+        params.update(overrides)
+        return UploadAdmission(**params)
+
+    return make
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(rate=10, capacity=10)
+    assert bucket.wait_time(10) == 0
+    bucket.consume(10)
+    assert 0 < bucket.wait_time(5) <= 0.5
+
+
+def test_admission_per_user_concurrency(make_admission):
+    admission = make_admission()
+    assert admission.acquire("alice", 1) is None
+    assert admission.acquire("alice", 1)[0] == 429
+    assert admission.acquire("bob", 1) is None
+    assert admission.acquire("carol", 1)[0] == 503
+
+    admission.release("alice")
+    assert admission.acquire("carol", 1) is None
+
+
+def test_admission_user_bandwidth(make_admission):
+    admission = make_admission()
+    assert admission.acquire("alice", 100) is None
+    admission.release("alice")
+
+    status, retry_after = admission.acquire("alice", 100)
+    assert status == 429
+    assert retry_after > 0
+    assert admission.acquire("bob", 100) is None
+
+
+def test_admission_shared_between_workers(make_admission):
+    worker_a, worker_b = make_admission(), make_admission()
+    assert worker_a.acquire("alice", 60) is None
+    assert worker_b.acquire("alice", 1)[0] == 429
+
+    worker_a.release("alice")
+    status, retry_after = worker_b.acquire("alice", 60)
+    assert status == 429
+    assert retry_after > 0
+
+
+def test_admission_reclaims_slots_of_dead_workers(make_admission):
+    admission = make_admission()
+    dead_pid = 2**22 + 1
+    with open(admission.state_path, "w") as f:
+        json.dump({"user_slots": {"alice": [dead_pid]}, "total_slots": {}}, f)
+
+    assert admission.acquire("alice", 1) is None
+    assert admission.user_slots.active == {"alice": [os.getpid()]}
+
+
+def register_upload_route(app):
+    @app.route("/upload", methods=["POST"])
+    @jwt_required()
+    @upload_admission_required
+    def upload_route():
+        return jsonify({"success": True})
+
+    with app.app_context():
+        return create_access_token(identity="test_user")
+
+
+def test_upload_admission_rejects_large_body(app, make_admission):
+    token = register_upload_route(app)
+
+    with patch("src.app._admission.upload_admission", make_admission()):
+        with app.test_client() as client:
+            response = client.post(
+                "/upload",
+                data=b"x" * 101,
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+    assert response.status_code == 413
+
+
+def test_upload_admission_rejects_extension_from_header(app, make_admission):
+    token = register_upload_route(app)
+
+    with patch("src.app._admission.upload_admission", make_admission()):
+        with app.test_client() as client:
+            response = client.post(
+                "/upload",
+                data=b"x",
+                headers={
+                    "Authorization": f"Bearer {token}",
+                    "X-File-Name": "payload.exe",
+                },
+            )
+
+    assert response.status_code == 400
+
+
+def test_upload_admission_sets_retry_after(app, make_admission):
+    token = register_upload_route(app)
+    admission = make_admission()
+    admission.acquire("test_user", 1)
+
+    with patch("src.app._admission.upload_admission", admission):
+        with app.test_client() as client:
+            response = client.post(
+                "/upload",
+                data=b"x",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_upload_admission_releases_slot(app, make_admission):
+    token = register_upload_route(app)
+    admission = make_admission()
+
+    with patch("src.app._admission.upload_admission", admission):
+        with app.test_client() as client:
+            for _ in range(2):
+                response = client.post(
+                    "/upload",
+                    data=b"x",
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                assert response.status_code == 200
+
+    assert admission.user_slots.active == {}
@@ -0,0 +1,198 @@
+import io
+import os
+import gzip
+import zlib
+import random
+import hashlib
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from src.config.settings import settings
+from src.app.file_dir import Tier, get_file_path, get_cold_file_path
+from src.app.storage import open_seekable_blob
+from src.app._admission import UploadAdmission
+from src.app.delta import DeltaError, compute_signature, compute_delta, apply_delta
+
+
+class TestDelta(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.block_size = 64
+        self.base = bytes(rng.getrandbits(8) for _ in range(64 * 20 + 10))
+        self.signature = compute_signature(io.BytesIO(self.base), self.block_size)
+
+    def rebuild(self, instructions, max_size=None):
+        out = io.BytesIO()
+        digest, size = apply_delta(
+            io.BytesIO(self.base), self.block_size, instructions, out, max_size
+        )
+        return out.getvalue(), digest, size
+
+    def test_signature(self):
+        self.assertEqual(len(self.signature), 21)
+        self.assertEqual(self.signature[0]["weak"], zlib.adler32(self.base[:64]))
+
+    def test_unchanged_file_is_all_copies(self):
+        instructions = compute_delta(self.signature, self.base, self.block_size)
+        self.assertEqual(instructions, [{"copy": 0, "count": 21}])
+
+        data, digest, size = self.rebuild(instructions)
+        self.assertEqual(data, self.base)
+        self.assertEqual(digest, hashlib.sha256(self.base).hexdigest())
+        self.assertEqual(size, len(self.base))
+
+    def test_small_edit_sends_small_literals(self):
+        new = self.base[:100] + b"inserted" + self.base[100:600] + self.base[700:]
+        instructions = compute_delta(self.signature, new, self.block_size)
+
+        literal_bytes = sum(
+            len(i["literal"]) for i in instructions if "literal" in i
+        )
+        self.assertLess(literal_bytes, 400)
+
+        data, digest, _ = self.rebuild(instructions)
+        self.assertEqual(data, new)
+        self.assertEqual(digest, hashlib.sha256(new).hexdigest())
+
+    def test_unrelated_file_is_all_literal(self):
+        new = os.urandom(300)
+        instructions = compute_delta(self.signature, new, self.block_size)
+        self.assertTrue(all("literal" in i for i in instructions))
+        self.assertEqual(self.rebuild(instructions)[0], new)
+
+    def test_copy_past_end_rejected(self):
+        with self.assertRaises(DeltaError):
+            self.rebuild([{"copy": 20, "count": 2}])
+        with self.assertRaises(DeltaError):
+            self.rebuild([{"copy": -1}])
+        with self.assertRaises(DeltaError):
+            self.rebuild([{"copy": 10**30}])
+
+    def test_output_size_limited(self):
+        instructions = [{"copy": 0, "count": 21}] * 3
+        self.assertEqual(
+            self.rebuild(instructions, max_size=3 * len(self.base))[2],
+            3 * len(self.base),
+        )
+        with self.assertRaises(DeltaError):
+            self.rebuild(instructions, max_size=3 * len(self.base) - 1)
+
+    def test_invalid_instructions_rejected(self):
+        with self.assertRaises(DeltaError):
+            self.rebuild([{"literal": "not base64!"}])
+        with self.assertRaises(DeltaError):
+            self.rebuild([{"move": 1}])
+        with self.assertRaises(DeltaError):
+            self.rebuild(["copy"])
+
+
+BASE = bytes(random.Random(7).getrandbits(8) for _ in range(2048))
+BASE_HASH = hashlib.sha256(BASE).hexdigest()
+
+
+@pytest.fixture
+def delta_client(tmp_path, monkeypatch):
+    from main import app
+
+    monkeypatch.chdir(tmp_path)
+    base_path = get_file_path(BASE_HASH)
+    os.makedirs(os.path.dirname(base_path))
+    with open(base_path, "wb") as f:
+        f.write(BASE)
+
+    admission = UploadAdmission(
+        state_path=str(tmp_path / "admission.json"),
+        max_concurrent_per_user=2,
+        max_concurrent_total=2,
+        user_bandwidth=10**9,
+        total_bandwidth=10**9,
+        max_upload_size=10**9,
+    )
+    with patch("src.app._access_owner.SessionLocal") as mock_owner_db, patch(
+        "src.app.routers.SessionLocal"
+    ), patch("src.app._admission.upload_admission", admission):
+        query = mock_owner_db.return_value.query.return_value
+        query.filter_by.return_value.first.return_value = MagicMock(tier="hot")
+        with app.app_context():
+            token = create_access_token(identity="test_user")
+
+        def post(new_content, instructions, new_hash=None):
+            return app.test_client().post(
+                f"/file/delta/{BASE_HASH}",
+                json={
+                    "hash": new_hash or hashlib.sha256(new_content).hexdigest(),
+                    "filename": "new.txt",
+                    "block_size": 1024,
+                    "instructions": instructions,
+                },
+                headers={"Authorization": f"Bearer {token}"},
+            )
+
+        yield post
+
+
+def temp_files():
+    return [name for name in os.listdir("store") if name.startswith(".delta-")]
+
+
+def test_delta_upload_stores_rebuilt_file(delta_client):
+    new = BASE + b"appended"
+    signature = compute_signature(io.BytesIO(BASE), 1024)
+    response = delta_client(new, compute_delta(signature, new, 1024))
+
+    assert response.status_code == 201
+    new_hash = hashlib.sha256(new).hexdigest()
+    assert response.get_json() == {"hash": new_hash}
+    with open(get_file_path(new_hash), "rb") as f:
+        assert f.read() == new
+    assert temp_files() == []
+
+
+def test_delta_upload_existing_file(delta_client):
+    response = delta_client(BASE, [{"copy": 0, "count": 2}])
+    assert response.status_code == 409
+
+
+def test_delta_upload_hash_mismatch(delta_client):
+    response = delta_client(b"", [{"copy": 0, "count": 1}], new_hash="cd" * 32)
+
+    assert response.status_code == 422
+    assert not os.path.exists(get_file_path("cd" * 32))
+    assert temp_files() == []
+
+
+def test_delta_upload_output_size_limited(delta_client):
+    with patch.object(settings, "MAX_UPLOAD_SIZE", 3 * len(BASE) - 1):
+        response = delta_client(BASE * 3, [{"copy": 0, "count": 2}] * 3)
+
+    assert response.status_code == 400
+    assert "exceeds" in response.get_json()["error"]
+    assert temp_files() == []
+
+
+def test_delta_upload_rejects_invalid_hash(delta_client):
+    with patch("src.app.routers.blob_exists") as mock_exists:
+        response = delta_client(b"", [{"copy": 0}], new_hash="/etc/passwd")
+
+    assert response.status_code == 400
+    mock_exists.assert_not_called()
+
+
+def test_cold_gzip_base_is_decompressed_for_seeking(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("store")
+    cold_path = get_cold_file_path(BASE_HASH, Tier.COLD_GZIP.value)
+    os.makedirs(os.path.dirname(cold_path))
+    with gzip.open(cold_path, "wb") as f:
+        f.write(BASE)
+
+    out = io.BytesIO()
+    with open_seekable_blob(BASE_HASH, cold_path, Tier.COLD_GZIP.value) as base:
+        assert not isinstance(base, gzip.GzipFile)
+        apply_delta(base, 1024, [{"copy": 1}, {"copy": 0}], out)
+
+    assert out.getvalue() == BASE[1024:] + BASE[:1024]
+    assert os.listdir("store") == []
@@ -0,0 +1,65 @@
+import os
+import re
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from src.config.settings import Settings, settings
+from src.app.download_offload import (
+    DownloadMode,
+    get_download_mode,
+    offload_response,
+)
+
+
+NGINX_CONF = os.path.join(os.path.dirname(__file__), "..", "docker", "nginx.conf")
+
+
+def test_download_mode_from_settings():
+    with patch("src.app.download_offload.settings") as mock_settings:
+        mock_settings.DOWNLOAD_MODE = Settings(
+            DOWNLOAD_MODE="X-Accel-Redirect"
+        ).DOWNLOAD_MODE
+        assert get_download_mode() is DownloadMode.X_ACCEL_REDIRECT
+
+    with pytest.raises(ValidationError):
+        Settings(DOWNLOAD_MODE="accel")
+
+    assert not DownloadMode.DIRECT.offloaded
+    assert DownloadMode.X_SENDFILE.offloaded
+
+
+def test_x_accel_redirect_response(app):
+    file_path = os.path.join("store", "ab", "abcdef")
+
+    with app.app_context():
+        response = offload_response(
+            file_path, "file_abcdef", DownloadMode.X_ACCEL_REDIRECT
+        )
+
+    assert response.status_code == 200
+    assert response.headers["X-Accel-Redirect"] == "/internal/store/ab/abcdef"
+    assert "X-Sendfile" not in response.headers
+    assert response.headers["Content-Disposition"] == "attachment; filename=file_abcdef"
+    assert response.get_data() == b""
+
+
+def test_x_sendfile_response(app):
+    file_path = os.path.join("store", "ab", "abcdef")
+
+    with app.app_context():
+        response = offload_response(file_path, "file_abcdef", DownloadMode.X_SENDFILE)
+
+    assert response.headers["X-Sendfile"] == os.path.abspath(file_path)
+    assert "X-Accel-Redirect" not in response.headers
+
+
+def test_nginx_internal_location_matches_accel_prefix():
+    with open(NGINX_CONF) as f:
+        conf = f.read()
+
+    internal = re.search(r"location (\S+) \{\s*internal;\s*alias (\S+);", conf)
+    assert internal is not None
+    assert internal.group(1) == settings.DOWNLOAD_ACCEL_PREFIX
+    assert internal.group(2) == "/app/store/"
@@ -0,0 +1,150 @@
+import os
+import time
+import threading
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from pydantic import ValidationError
+
+from src.config.settings import Settings
+from src.app.durability import (
+    DurabilityMode,
+    GroupCommitter,
+    get_durability_mode,
+    make_durable,
+)
+from src.app.file_dir import Tier, get_file_path
+from src.app.storage import save_blob
+
+
+class TestDurabilityMode(unittest.TestCase):
+    def test_mode_validated_with_settings(self):
+        self.assertEqual(Settings(DURABILITY_MODE="Group").DURABILITY_MODE, "group")
+        with self.assertRaises(ValidationError):
+            Settings(DURABILITY_MODE="sync")
+
+    def test_default_mode_is_fsync(self):
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("DURABILITY_MODE", None)
+            self.assertEqual(Settings().DURABILITY_MODE, "fsync")
+        with patch("src.app.durability.settings") as mock_settings:
+            mock_settings.DURABILITY_MODE = "group"
+            self.assertIs(get_durability_mode(), DurabilityMode.GROUP)
+
+
+class TestMakeDurable(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.file_path = os.path.join(self.temp_dir.name, "blob")
+        with open(self.file_path, "wb") as f:
+            f.write(b"data")
+
+    def test_none_mode_skips_fsync(self):
+        with patch("src.app.durability.fsync_path") as mock_fsync:
+            make_durable([self.file_path], [self.temp_dir.name], DurabilityMode.NONE)
+        mock_fsync.assert_not_called()
+
+    def test_fsync_mode_flushes_file_then_dir(self):
+        with patch("src.app.durability.fsync_path") as mock_fsync:
+            make_durable([self.file_path], [self.temp_dir.name], DurabilityMode.FSYNC)
+        self.assertEqual(
+            [call.args[0] for call in mock_fsync.call_args_list],
+            [self.file_path, self.temp_dir.name],
+        )
+
+    def test_fsync_real_paths(self):
+        make_durable([self.file_path], [self.temp_dir.name], DurabilityMode.FSYNC)
+
+
+class TestGroupCommitter(unittest.TestCase):
+    def test_concurrent_writers_share_fsyncs(self):
+        synced = []
+        lock = threading.Lock()
+
+        def slow_fsync(path, data_only=False):
+            time.sleep(0.02)
+            with lock:
+                synced.append(path)
+
+        committer = GroupCommitter()
+        with patch("src.app.durability.fsync_path", side_effect=slow_fsync):
+            threads = [
+                threading.Thread(
+                    target=committer.sync, args=([f"file{i}"], ["store/ab"])
+                )
+                for i in range(10)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual({f"file{i}" for i in range(10)}, set(synced) - {"store/ab"})
+        self.assertLess(synced.count("store/ab"), 10)
+        self.assertLess(committer.batches, 10)
+
+    def test_batch_fsyncs_files_in_parallel(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def parallel_fsync(path, data_only=False):
+            if data_only:
+                barrier.wait()
+
+        # The flusher waits for the full batch of 3, whose files can only all
+        # pass the barrier if they are fsynced concurrently
+        committer = GroupCommitter(max_delay=5, max_batch=3, flush_threads=3)
+        with patch("src.app.durability.fsync_path", side_effect=parallel_fsync):
+            threads = [
+                threading.Thread(target=committer.sync, args=([f"file{i}"], ["d"]))
+                for i in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(timeout=10)
+
+        self.assertFalse(barrier.broken)
+        self.assertEqual(committer.batches, 1)
+
+    def test_error_reaches_only_affected_writer(self):
+        def failing_fsync(path, data_only=False):
+            if path == "bad":
+                raise OSError("disk gone")
+
+        committer = GroupCommitter()
+        with patch("src.app.durability.fsync_path", side_effect=failing_fsync):
+            committer.sync(["good"])
+            with self.assertRaises(OSError):
+                committer.sync(["bad"])
+
+
+class TestSaveBlob(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.temp_dir.name)
+        patcher = patch("src.app.storage.pack_store", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.file_hash = "ab" * 32
+        self.file_path = get_file_path(self.file_hash)
+
+    def test_data_flushed_before_rename(self):
+        def check_durable(files, dirs):
+            if files:
+                self.assertFalse(os.path.exists(self.file_path))
+
+        with patch("src.app.storage.make_durable", side_effect=check_durable):
+            self.assertEqual(save_blob(self.file_hash, b"data"), Tier.HOT.value)
+        with open(self.file_path, "rb") as f:
+            self.assertEqual(f.read(), b"data")
+        self.assertEqual(os.listdir(os.path.dirname(self.file_path)), [self.file_hash])
+
+    def test_failed_write_leaves_no_blob(self):
+        with patch("src.app.storage.make_durable", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                save_blob(self.file_hash, b"data")
+        self.assertEqual(os.listdir(os.path.dirname(self.file_path)), [])
@@ -0,0 +1,70 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from src.app.file_cache import FileCache
+from src.app.file_dir import Tier, get_file_path
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = FileCache(max_bytes=10, max_file_size=4)
+
+    def test_miss_then_hit(self):
+        self.assertIsNone(self.cache.get("aa"))
+        self.cache.put("aa", b"1234")
+        self.assertEqual(self.cache.get("aa"), b"1234")
+
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_large_file_not_cached(self):
+        self.assertFalse(self.cache.accepts(5))
+        self.cache.put("aa", b"12345")
+        self.assertIsNone(self.cache.get("aa"))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_lru_eviction_within_budget(self):
+        self.cache.put("aa", b"1234")
+        self.cache.put("bb", b"1234")
+        self.cache.get("aa")
+        self.cache.put("cc", b"1234")
+
+        self.assertEqual(self.cache.get("aa"), b"1234")
+        self.assertIsNone(self.cache.get("bb"))
+        self.assertEqual(self.cache.get("cc"), b"1234")
+        self.assertEqual(self.cache.size, 8)
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_discard(self):
+        self.cache.put("aa", b"1234")
+        self.cache.discard("aa")
+        self.cache.discard("missing")
+        self.assertIsNone(self.cache.get("aa"))
+        self.assertEqual(self.cache.size, 0)
+
+
+def test_uncacheable_download_skips_lookup(tmp_path, monkeypatch):
+    from main import app
+    from src.app.routers import _serve_blob
+
+    monkeypatch.chdir(tmp_path)
+    cache = FileCache(max_bytes=10, max_file_size=4)
+    small_hash, large_hash = "aa" * 32, "bb" * 32
+    for file_hash, content in ((small_hash, b"1234"), (large_hash, b"12345")):
+        file_path = get_file_path(file_hash)
+        os.makedirs(os.path.dirname(file_path))
+        with open(file_path, "wb") as f:
+            f.write(content)
+
+    with patch("src.app.routers.file_cache", cache), app.test_request_context():
+        for file_hash in (large_hash, small_hash, small_hash):
+            file_path = os.path.abspath(get_file_path(file_hash))
+            response = _serve_blob(file_hash, Tier.HOT.value, file_path)
+            response.close()
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert cache.get(large_hash) is None
@@ -1,13 +1,32 @@
 import os
 import unittest
 from tempfile import TemporaryDirectory
+from unittest.mock import patch
 
-from src.app.file_dir import StorageDir, Extensions, get_file_path, allowed_file
+from src.app.file_dir import (
+    StorageDir,
+    Extensions,
+    Tier,
+    get_file_path,
+    get_cold_file_path,
+    resolve_file_path,
+    allowed_file,
+)
 
 
 class TestStorageDir(unittest.TestCase):
     def test_storage_dir_path(self):
         self.assertEqual(StorageDir.STORE.path, "store")
+        self.assertEqual(StorageDir.PACK.path, "pack")
+        self.assertEqual(StorageDir.COLD.path, "cold")
+
+    def test_cold_root_setting(self):
+        with patch("src.app.file_dir.settings.TIERING_COLD_ROOT", "/mnt/cold"):
+            self.assertEqual(StorageDir.COLD.path, "/mnt/cold")
+            self.assertEqual(
+                get_cold_file_path("abcdef", Tier.COLD.value),
+                os.path.join("/mnt/cold", "ab", "abcdef"),
+            )
 
 
 class TestExtensions(unittest.TestCase):
@@ -39,6 +58,34 @@ class TestGetFilePath(unittest.TestCase):
             get_file_path(None)
 
 
+class TestResolveFilePath(unittest.TestCase):
+    def test_cold_file_path(self):
+        self.assertEqual(
+            get_cold_file_path("abcdef", Tier.COLD.value),
+            os.path.join("cold", "ab", "abcdef"),
+        )
+        self.assertEqual(
+            get_cold_file_path("abcdef", Tier.COLD_GZIP.value),
+            os.path.join("cold", "ab", "abcdef.gz"),
+        )
+        self.assertIsNone(get_cold_file_path("a", Tier.COLD.value))
+
+    def test_resolve_by_tier(self):
+        self.assertEqual(
+            resolve_file_path("abcdef", Tier.HOT.value), get_file_path("abcdef")
+        )
+        self.assertEqual(
+            resolve_file_path("abcdef", Tier.COLD_GZIP.value),
+            get_cold_file_path("abcdef", Tier.COLD_GZIP.value),
+        )
+
+    def test_cold_tiers(self):
+        self.assertFalse(Tier.HOT.is_cold)
+        self.assertFalse(Tier.PACKED.is_cold)
+        self.assertTrue(Tier.COLD.is_cold)
+        self.assertTrue(Tier.COLD_GZIP.is_cold)
+
+
 class TestAllowedFile(unittest.TestCase):
     def test_allowed_extensions(self):
         for ext in Extensions:
@@ -0,0 +1,125 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from src.app.pack_store import PackStore
+
+
+class TestPackStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.root = self.temp_dir.name
+
+    def make_store(self):
+        return PackStore(self.root, segment_size=10, max_file_size=8)
+
+    def test_put_and_get(self):
+        store = self.make_store()
+        self.assertTrue(store.put("aa", b"hello"))
+        self.assertFalse(store.put("aa", b"hello"))
+        self.assertTrue(store.contains("aa"))
+        self.assertEqual(store.get("aa"), b"hello")
+        self.assertIsNone(store.get("bb"))
+
+    def test_accepts(self):
+        store = self.make_store()
+        self.assertTrue(store.accepts(8))
+        self.assertFalse(store.accepts(9))
+
+    def test_new_segment_when_full(self):
+        store = self.make_store()
+        store.put("aa", b"123456")
+        store.put("bb", b"123456")
+        self.assertEqual(store._segments(), [1, 2])
+        self.assertEqual(store.get("bb"), b"123456")
+
+    def test_index_survives_reopen(self):
+        store = self.make_store()
+        store.put("aa", b"hello")
+        store.put("bb", b"world")
+        store.delete("aa")
+
+        reopened = self.make_store()
+        self.assertFalse(reopened.contains("aa"))
+        self.assertEqual(reopened.get("bb"), b"world")
+
+    def test_sees_writes_from_other_instance(self):
+        reader = self.make_store()
+        writer = self.make_store()
+        writer.put("aa", b"hello")
+        self.assertEqual(reader.get("aa"), b"hello")
+
+    def test_torn_index_line_is_ignored(self):
+        store = self.make_store()
+        store.put("aa", b"hello")
+        with open(store.index_path, "ab") as f:
+            f.write(b"\nP bb 1 5")
+
+        reopened = self.make_store()
+        self.assertTrue(reopened.contains("aa"))
+        self.assertFalse(reopened.contains("bb"))
+
+        self.assertTrue(store.put("cc", b"world"))
+        self.assertEqual(store.get("cc"), b"world")
+        self.assertEqual(self.make_store().get("cc"), b"world")
+        self.assertEqual(reopened.get("cc"), b"world")
+        self.assertFalse(reopened.contains("bb"))
+
+    def test_compact_flushes_new_index_before_removing_segments(self):
+        store = self.make_store()
+        store.put("aa", b"123456")
+        store.put("bb", b"1234")
+        store.put("cc", b"123456")
+        store.delete("aa")
+
+        flushes = []
+
+        def record(files, dirs, mode):
+            with open(store.index_path) as f:
+                index_lines = len(f.readlines())
+            segment_exists = os.path.exists(store._segment_path(1))
+            flushes.append((files, dirs, index_lines, segment_exists))
+
+        with patch("src.app.pack_store.make_durable", side_effect=record):
+            store.compact()
+
+        self.assertEqual(flushes[-1], ([], [self.root], 2, True))
+
+    def test_reload_swaps_index_for_lock_free_readers(self):
+        store = self.make_store()
+        store.put("aa", b"123456")
+        store.put("bb", b"1234")
+        store.put("cc", b"123456")
+        store.delete("aa")
+
+        before = store._index
+        snapshot = dict(before)
+        store.compact()
+
+        self.assertIsNot(store._index, before)
+        self.assertEqual(before, snapshot)
+        self.assertEqual(store.size("bb"), 4)
+        self.assertIsNone(store.size("aa"))
+
+    def test_compact_reclaims_deleted_space(self):
+        store = self.make_store()
+        store.put("aa", b"123456")
+        store.put("bb", b"1234")
+        store.put("cc", b"123456")
+        store.delete("aa")
+
+        reader = self.make_store()
+        self.assertEqual(store.compact(), 1)
+        self.assertFalse(os.path.exists(store._segment_path(1)))
+        self.assertEqual(store.get("bb"), b"1234")
+        self.assertEqual(store.get("cc"), b"123456")
+        self.assertFalse(store.contains("aa"))
+        self.assertEqual(reader.get("bb"), b"1234")
+
+    def test_compact_keeps_active_segment(self):
+        store = self.make_store()
+        store.put("aa", b"123456")
+        store.delete("aa")
+        self.assertEqual(store.compact(), 0)
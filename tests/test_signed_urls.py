@@ -0,0 +1,218 @@
+import os
+import hashlib
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from flask_jwt_extended import create_access_token
+
+from src.app.signed_urls import (
+    LINK_ID,
+    RevocationList,
+    SignedUrlError,
+    mint,
+    verify,
+    parse_range,
+)
+
+FILE_HASH = "ab" * 32
+
+
+@pytest.fixture
+def revocations(tmp_path):
+    revocations = RevocationList(str(tmp_path / "revoked.log"))
+    with patch("src.app.signed_urls.revoked_links", revocations), patch(
+        "src.app.signed_urls.secret", b"test-secret"
+    ):
+        yield revocations
+
+
+def test_mint_and_verify(revocations):
+    params = mint(FILE_HASH, ttl=60)
+    expires, byte_range = verify(FILE_HASH, MultiDict(params))
+    assert expires == int(params["e"])
+    assert byte_range is None
+
+
+def test_signed_range(revocations):
+    params = mint(FILE_HASH, ttl=60, byte_range="10-19")
+    assert verify(FILE_HASH, MultiDict(params))[1] == (10, 19)
+
+    params["r"] = "0-19"
+    with pytest.raises(SignedUrlError) as error:
+        verify(FILE_HASH, MultiDict(params))
+    assert error.value.status == 403
+
+
+def test_signature_bound_to_hash(revocations):
+    params = mint(FILE_HASH, ttl=60)
+    with pytest.raises(SignedUrlError):
+        verify("cd" * 32, MultiDict(params))
+
+
+def test_expired_link(revocations):
+    params = mint(FILE_HASH, ttl=60)
+    with patch("src.app.signed_urls.time.time", return_value=int(params["e"]) + 1):
+        with pytest.raises(SignedUrlError) as error:
+            verify(FILE_HASH, MultiDict(params))
+    assert error.value.status == 410
+
+
+def test_revoked_link(revocations):
+    params = mint(FILE_HASH, ttl=60)
+    revocations.revoke(f"{FILE_HASH}:{params['l']}", int(params["e"]))
+    with pytest.raises(SignedUrlError) as error:
+        verify(FILE_HASH, MultiDict(params))
+    assert error.value.status == 410
+
+
+def test_revocation_key_is_one_token(revocations):
+    assert LINK_ID.fullmatch(mint(FILE_HASH, ttl=60)["l"])
+    for key in ("", f"{FILE_HASH}:a b", f"{FILE_HASH}:a\nforged 9999999999"):
+        with pytest.raises(ValueError):
+            revocations.revoke(key, 9999999999)
+    assert not os.path.exists(revocations.path)
+
+
+def test_revoke_endpoint_rejects_malformed_link_id(
+    tmp_path, monkeypatch, revocations
+):
+    from main import app
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("store", FILE_HASH[:2]))
+    open(os.path.join("store", FILE_HASH[:2], FILE_HASH), "wb").close()
+
+    with patch("src.app._access_owner.SessionLocal") as mock_owner_db, patch(
+        "src.app.routers.revoked_links", revocations
+    ):
+        query = mock_owner_db.return_value.query.return_value
+        query.filter_by.return_value.first.return_value = MagicMock(tier="hot")
+        with app.app_context():
+            token = create_access_token(identity="test_user")
+        headers = {"Authorization": f"Bearer {token}"}
+
+        with app.test_client() as client:
+            response = client.delete(
+                f"/file/share/{FILE_HASH}/abc%0Aforged", headers=headers
+            )
+            assert response.status_code == 400
+            assert not os.path.exists(revocations.path)
+
+            link_id = mint(FILE_HASH, ttl=60)["l"]
+            response = client.delete(
+                f"/file/share/{FILE_HASH}/{link_id}", headers=headers
+            )
+            assert response.status_code == 200
+            assert revocations.is_revoked(f"{FILE_HASH}:{link_id}")
+
+
+def test_malformed_link(revocations):
+    with pytest.raises(SignedUrlError) as error:
+        verify(FILE_HASH, MultiDict({"e": "soon"}))
+    assert error.value.status == 400
+
+
+def test_parse_range():
+    assert parse_range("") is None
+    assert parse_range("5-5") == (5, 5)
+    for value in ("5", "5-4", "a-b", "-5"):
+        with pytest.raises(SignedUrlError):
+            parse_range(value)
+
+
+def test_links_disabled_without_secret(revocations):
+    params = mint(FILE_HASH, ttl=60)
+    with patch("src.app.signed_urls.secret", None):
+        for action in (
+            lambda: mint(FILE_HASH, ttl=60),
+            lambda: verify(FILE_HASH, MultiDict(params)),
+        ):
+            with pytest.raises(SignedUrlError) as error:
+                action()
+            assert error.value.status == 503
+
+
+def test_revocation_list_shared_and_compacted(tmp_path):
+    path = str(tmp_path / "revoked.log")
+    writer = RevocationList(path)
+    reader = RevocationList(path)
+
+    writer.revoke("live", 2**40)
+    assert reader.is_revoked("live")
+    assert not reader.is_revoked("other")
+
+    for n in range(150):
+        writer.revoke(f"expired{n}", 1)
+    with open(path) as f:
+        assert len(f.readlines()) < 100
+    assert writer.is_revoked("live")
+    assert not writer.is_revoked("expired0")
+    assert reader.is_revoked("live")
+
+
+def test_revocation_survives_concurrent_compaction(tmp_path):
+    path = str(tmp_path / "revoked.log")
+    workers = [RevocationList(path) for _ in range(4)]
+
+    def revoke_many(worker, index):
+        for n in range(100):
+            worker.revoke(f"live{index}-{n}", 2**40)
+            worker.revoke(f"expired{index}-{n}", 1)
+
+    threads = [
+        threading.Thread(target=revoke_many, args=(worker, index))
+        for index, worker in enumerate(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reader = RevocationList(path)
+    assert all(
+        reader.is_revoked(f"live{index}-{n}") for index in range(4) for n in range(100)
+    )
+    leftovers = [name for name in os.listdir(tmp_path) if name != "revoked.log"]
+    assert leftovers == ["revoked.log.lock"]
+
+
+def test_signed_download_skips_database(tmp_path, monkeypatch, revocations):
+    from main import app
+
+    content = b"0123456789" * 10
+    file_hash = hashlib.sha256(content).hexdigest()
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("store", file_hash[:2]))
+    with open(os.path.join("store", file_hash[:2], file_hash), "wb") as f:
+        f.write(content)
+
+    with patch("src.app.routers.SessionLocal") as mock_routers_db, patch(
+        "src.app._access_owner.SessionLocal"
+    ) as mock_owner_db, patch("src.app.routers.access_tracker"):
+        with app.test_client() as client:
+            response = client.get(
+                f"/file/s/{file_hash}", query_string=mint(file_hash, ttl=60)
+            )
+            assert response.status_code == 200
+            assert response.data == content
+            assert "public" in response.headers["Cache-Control"]
+            assert response.headers["ETag"] == f'"{file_hash}"'
+
+            response = client.get(
+                f"/file/s/{file_hash}",
+                query_string=mint(file_hash, ttl=60, byte_range="10-19"),
+            )
+            assert response.status_code == 206
+            assert response.data == content[10:20]
+            assert response.headers["Content-Range"] == "bytes 10-19/100"
+
+            params = mint(file_hash, ttl=60)
+            params["s"] = params["s"][::-1]
+            response = client.get(f"/file/s/{file_hash}", query_string=params)
+            assert response.status_code == 403
+
+    mock_routers_db.assert_not_called()
+    mock_owner_db.assert_not_called()
@@ -0,0 +1,318 @@
+import os
+import gzip
+import hashlib
+import time
+import unittest
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+from unittest.mock import patch, MagicMock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.db.models import File
+from src.db.data_base import Base
+from src.app.file_dir import Tier, get_file_path, get_cold_file_path
+from src.app.storage import delete_blob
+from src.app.signed_urls import RevocationList, mint
+from src.app.tiering import AccessTracker, TieringEngine, copy_blob, open_blob
+
+
+class TestCopyBlob(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.hot_path = os.path.join(self.temp_dir.name, "store", "ab", "abcdef")
+        os.makedirs(os.path.dirname(self.hot_path))
+        with open(self.hot_path, "wb") as f:
+            f.write(b"payload" * 100)
+
+    def test_demote_compressed_and_promote(self):
+        cold_path = os.path.join(self.temp_dir.name, "cold", "ab", "abcdef.gz")
+        copied = copy_blob(
+            self.hot_path, cold_path, Tier.HOT.value, Tier.COLD_GZIP.value, 10**9
+        )
+        self.assertEqual(copied, 700)
+        self.assertFalse(os.path.exists(cold_path + ".tmp"))
+        with gzip.open(cold_path, "rb") as f:
+            self.assertEqual(f.read(), b"payload" * 100)
+        with open_blob(cold_path, Tier.COLD_GZIP.value) as f:
+            self.assertEqual(f.read(), b"payload" * 100)
+
+        os.remove(self.hot_path)
+        copy_blob(cold_path, self.hot_path, Tier.COLD_GZIP.value, Tier.HOT.value, 10**9)
+        with open(self.hot_path, "rb") as f:
+            self.assertEqual(f.read(), b"payload" * 100)
+
+    def test_copy_is_throttled(self):
+        cold_path = os.path.join(self.temp_dir.name, "cold", "ab", "abcdef")
+        with patch("src.app.tiering.time.sleep") as mock_sleep:
+            copy_blob(self.hot_path, cold_path, Tier.HOT.value, Tier.COLD.value, 100)
+        mock_sleep.assert_called_once()
+        self.assertGreater(mock_sleep.call_args[0][0], 6)
+
+
+class TestAccessTracker(unittest.TestCase):
+    def test_batches_reads_into_one_flush(self):
+        tracker = AccessTracker(flush_interval=60, max_pending=10)
+        with patch("src.app.tiering.SessionLocal") as mock_db:
+            mock_session = MagicMock()
+            mock_db.return_value = mock_session
+
+            tracker.record("aa")
+            tracker.record("aa")
+            tracker.record("bb")
+            mock_db.assert_not_called()
+
+            self.assertEqual(tracker.flush(), 2)
+            self.assertEqual(mock_session.query.call_count, 2)
+            mock_session.commit.assert_called_once()
+            self.assertEqual(tracker.flush(), 0)
+
+    def test_full_buffer_wakes_flusher(self):
+        tracker = AccessTracker(flush_interval=60, max_pending=2)
+        with patch("src.app.tiering.SessionLocal") as mock_db:
+            tracker.record("aa")
+            self.assertFalse(tracker._full.is_set())
+            tracker.record("bb")
+            self.assertTrue(tracker._full.is_set())
+            mock_db.assert_not_called()
+
+    def test_keeps_reads_when_flush_fails(self):
+        tracker = AccessTracker(flush_interval=60, max_pending=10)
+        with patch("src.app.tiering.SessionLocal") as mock_db:
+            mock_db.return_value.commit.side_effect = Exception("db down")
+            tracker.record("aa")
+            self.assertEqual(tracker.flush(), 0)
+        self.assertEqual(tracker._pending, {"aa": 1})
+
+
+class TestTieringEngine(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.temp_dir.name)
+
+        db_engine = create_engine(
+            "sqlite://",
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+        Base.metadata.create_all(db_engine)
+        self.Session = sessionmaker(bind=db_engine)
+        patcher = patch("src.app.tiering.SessionLocal", self.Session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.engine = TieringEngine(
+            cold_after=timedelta(days=30),
+            compress=True,
+            max_bytes_per_second=10**9,
+            batch_size=10,
+            state_dir="cold",
+            retire_delay=0,
+        )
+        self.content = b"payload" * 100
+        self.file_hash = "ab" * 32
+        self.hot_path = get_file_path(self.file_hash)
+        self.cold_path = get_cold_file_path(self.file_hash, Tier.COLD_GZIP.value)
+        os.makedirs(os.path.dirname(self.hot_path))
+        with open(self.hot_path, "wb") as f:
+            f.write(self.content)
+
+        db = self.Session()
+        db.add(File(hash=self.file_hash, user_id=1, tier=Tier.HOT.value))
+        db.commit()
+        db.close()
+
+    def tier(self):
+        db = self.Session()
+        try:
+            return db.query(File.tier).filter(File.hash == self.file_hash).scalar()
+        finally:
+            db.close()
+
+    def test_demote_then_promote(self):
+        self.assertTrue(
+            self.engine._move(self.file_hash, {Tier.HOT.value}, Tier.COLD_GZIP.value)
+        )
+        self.assertEqual(self.tier(), Tier.COLD_GZIP.value)
+        self.assertTrue(os.path.exists(self.hot_path))
+        self.assertEqual(self.engine.remove_retired(), 1)
+        self.assertFalse(os.path.exists(self.hot_path))
+        with open_blob(self.cold_path, Tier.COLD_GZIP.value) as f:
+            self.assertEqual(f.read(), self.content)
+
+        self.engine.request_promotion(self.file_hash)
+        self.assertEqual(self.engine.promote_pending(), 1)
+        self.assertEqual(self.tier(), Tier.HOT.value)
+        self.assertEqual(self.engine.remove_retired(), 1)
+        self.assertFalse(os.path.exists(self.cold_path))
+        with open(self.hot_path, "rb") as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_old_copy_kept_until_retire_delay(self):
+        self.engine.retire_delay = 60
+        self.engine._move(self.file_hash, {Tier.HOT.value}, Tier.COLD_GZIP.value)
+        self.assertEqual(self.engine.remove_retired(), 0)
+        self.assertTrue(os.path.exists(self.hot_path))
+
+    def test_copy_moved_back_is_not_retired(self):
+        self.engine._move(self.file_hash, {Tier.HOT.value}, Tier.COLD_GZIP.value)
+        self.engine._move(self.file_hash, {Tier.COLD_GZIP.value}, Tier.HOT.value)
+
+        self.assertEqual(self.engine.remove_retired(), 1)
+        self.assertTrue(os.path.exists(self.hot_path))
+        self.assertFalse(os.path.exists(self.cold_path))
+
+    def test_row_deleted_during_copy_discards_copy(self):
+        def delete_then_copy(*args):
+            db = self.Session()
+            db.query(File).filter(File.hash == self.file_hash).delete()
+            db.commit()
+            db.close()
+            return copy_blob(*args)
+
+        with patch("src.app.tiering.copy_blob", side_effect=delete_then_copy):
+            self.assertFalse(
+                self.engine._move(
+                    self.file_hash, {Tier.HOT.value}, Tier.COLD_GZIP.value
+                )
+            )
+        self.assertFalse(os.path.exists(self.cold_path))
+        self.assertEqual(self.engine.remove_retired(), 1)
+        self.assertFalse(os.path.exists(self.hot_path))
+
+    def test_retire_queue_survives_restart(self):
+        self.engine.retire_delay = 60
+        self.engine._move(self.file_hash, {Tier.HOT.value}, Tier.COLD_GZIP.value)
+
+        restarted = TieringEngine(
+            cold_after=timedelta(days=30),
+            compress=True,
+            max_bytes_per_second=10**9,
+            batch_size=10,
+            state_dir="cold",
+        )
+        self.assertEqual(restarted.remove_retired(), 0)
+        with patch("src.app.tiering.time.time", return_value=time.time() + 61):
+            self.assertEqual(restarted.remove_retired(), 1)
+        self.assertFalse(os.path.exists(self.hot_path))
+        self.assertTrue(os.path.exists(self.cold_path))
+        self.assertIsNone(restarted._next_retirement())
+
+    def test_failed_copy_keeps_row(self):
+        os.remove(self.hot_path)
+        self.assertFalse(
+            self.engine._move(self.file_hash, {Tier.HOT.value}, Tier.COLD_GZIP.value)
+        )
+        self.assertEqual(self.tier(), Tier.HOT.value)
+        self.assertEqual(os.listdir(os.path.dirname(self.cold_path)), [])
+
+    def test_delete_removes_copies_in_every_tier(self):
+        self.engine.retire_delay = 60
+        self.engine._move(self.file_hash, {Tier.HOT.value}, Tier.COLD_GZIP.value)
+
+        delete_blob(self.file_hash)
+        self.assertFalse(os.path.exists(self.hot_path))
+        self.assertFalse(os.path.exists(self.cold_path))
+
+    def test_move_skips_rows_in_other_tiers(self):
+        self.assertFalse(
+            self.engine._move(self.file_hash, {Tier.COLD.value}, Tier.HOT.value)
+        )
+        self.assertEqual(self.tier(), Tier.HOT.value)
+
+    def test_demote_idle_moves_candidates(self):
+        with patch("src.app.tiering.SessionLocal") as mock_db, patch.object(
+            self.engine, "_move", return_value=True
+        ) as mock_move:
+            query = mock_db.return_value.query.return_value.filter.return_value
+            query.order_by.return_value.limit.return_value.all.return_value = [
+                ("aa",),
+                ("bb",),
+            ]
+            self.assertEqual(self.engine.demote_idle(), 2)
+
+        mock_move.assert_any_call("aa", {Tier.HOT.value}, Tier.COLD_GZIP.value)
+        mock_move.assert_any_call("bb", {Tier.HOT.value}, Tier.COLD_GZIP.value)
+
+
+class SendfileWrapper:
+    """Stands in for gunicorn's wsgi.file_wrapper, which sendfile()s fileno()"""
+
+    def __init__(self, filelike, blksize=8192):
+        self.filelike = filelike
+
+    def __iter__(self):
+        fd, offset = self.filelike.fileno(), 0
+        while chunk := os.pread(fd, 8192, offset):
+            offset += len(chunk)
+            yield chunk
+
+    def close(self):
+        self.filelike.close()
+
+
+def test_cold_gzip_download_returns_original_bytes(tmp_path, monkeypatch):
+    from main import app
+
+    content = b"payload" * 200
+    file_hash = hashlib.sha256(content).hexdigest()
+    monkeypatch.chdir(tmp_path)
+    cold_path = get_cold_file_path(file_hash, Tier.COLD_GZIP.value)
+    os.makedirs(os.path.dirname(cold_path))
+    with gzip.open(cold_path, "wb") as f:
+        f.write(content)
+
+    revocations = RevocationList(str(tmp_path / "revoked.log"))
+    with patch("src.app.routers.tiering_engine") as mock_engine, patch(
+        "src.app.routers.access_tracker"
+    ), patch("src.app.signed_urls.revoked_links", revocations), patch(
+        "src.app.signed_urls.secret", b"test-secret"
+    ):
+        with app.test_client() as client:
+            response = client.get(
+                f"/file/s/{file_hash}",
+                query_string=mint(file_hash, ttl=60),
+                environ_base={"wsgi.file_wrapper": SendfileWrapper},
+            )
+
+    assert response.status_code == 200
+    assert response.data == content
+    mock_engine.request_promotion.assert_called_once_with(file_hash)
+
+
+def test_cold_gzip_range_past_end_not_satisfiable(tmp_path, monkeypatch):
+    from main import app
+
+    content = b"payload" * 200
+    file_hash = hashlib.sha256(content).hexdigest()
+    monkeypatch.chdir(tmp_path)
+    cold_path = get_cold_file_path(file_hash, Tier.COLD_GZIP.value)
+    os.makedirs(os.path.dirname(cold_path))
+    with gzip.open(cold_path, "wb") as f:
+        f.write(content)
+
+    revocations = RevocationList(str(tmp_path / "revoked.log"))
+    with patch("src.app.routers.tiering_engine"), patch(
+        "src.app.routers.access_tracker"
+    ), patch("src.app.signed_urls.revoked_links", revocations), patch(
+        "src.app.signed_urls.secret", b"test-secret"
+    ):
+        with app.test_client() as client:
+            response = client.get(
+                f"/file/s/{file_hash}",
+                query_string=mint(file_hash, ttl=60, byte_range="10-19"),
+            )
+            assert response.status_code == 206
+            assert response.data == content[10:20]
+
+            for byte_range in (f"{len(content)}-{len(content) + 9}", "5000-5009"):
+                response = client.get(
+                    f"/file/s/{file_hash}",
+                    query_string=mint(file_hash, ttl=60, byte_range=byte_range),
+                )
+                assert response.status_code == 416
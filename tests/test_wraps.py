@@ -28,7 +28,7 @@ def test_file_owner_required_success(app):
     with patch("src.app._access_owner.SessionLocal") as mock_db, patch(
         "src.app._access_owner.os.path.exists"
     ) as mock_exists, patch(
-        "src.app._access_owner.get_file_path"
+        "src.app._access_owner.resolve_file_path"
     ) as mock_get_path, patch(
         "src.app._access_owner.get_jwt_identity"
     ) as mock_jwt: